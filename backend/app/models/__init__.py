@@ -1,12 +1,18 @@
-from .database import Base, engine, SessionLocal, get_db
+from .database import Base, engine, SessionLocal, get_db, async_engine, AsyncSessionLocal, get_async_db, get_pool_stats
 from .user import User
 from .transaction import Transaction
+from .blockchain import BlockchainTransaction
 
 __all__ = [
     "Base",
     "engine", 
     "SessionLocal",
     "get_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
+    "get_pool_stats",
     "User",
-    "Transaction"
+    "Transaction",
+    "BlockchainTransaction"
 ]
\ No newline at end of file
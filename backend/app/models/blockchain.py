@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from app.models.database import Base
+from datetime import datetime
+
+class BlockchainTransaction(Base):
+    __tablename__ = "blockchain_transactions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tx_hash = Column(String, unique=True, index=True, nullable=False)
+    status = Column(String, default="pending", nullable=False)
+    network = Column(String)
+    amount = Column(Float)
+    sender_address = Column(String)
+    recipient_address = Column(String)
+    gas_fee = Column(Float)
+    confirmation_time = Column(Float)
+    confirmations = Column(Integer, default=0)
+    required_confirmations = Column(Integer, default=12)
+    memo = Column(String)
+    explorer_url = Column(String)
+    initiated_at = Column(DateTime, default=datetime.utcnow)
+    confirmed_at = Column(DateTime)
+
+    __table_args__ = (
+        # Status listings and resuming pending confirmations, oldest first
+        Index("ix_blockchain_transactions_status_initiated", "status", "initiated_at"),
+    )
+
+    def to_record(self) -> dict:
+        return {
+            'hash': self.tx_hash,
+            'status': self.status,
+            'network': self.network,
+            'amount': self.amount,
+            'sender_address': self.sender_address,
+            'recipient_address': self.recipient_address,
+            'gas_fee': self.gas_fee,
+            'confirmation_time': self.confirmation_time,
+            'confirmations': self.confirmations,
+            'required_confirmations': self.required_confirmations,
+            'initiated_at': self.initiated_at,
+            'confirmed_at': self.confirmed_at,
+            'memo': self.memo,
+            'explorer_url': self.explorer_url,
+        }
@@ -2,11 +2,87 @@ from decouple import config
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from datetime import datetime
 
+from .pool import PoolStats, async_pool_class, install_sqlite_pragmas, sync_pool_class, track_connections
+
+# Async drivers for each sync URL scheme (aiosqlite locally, asyncpg in production)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
 SQLALCHEMY_DATABASE_URL = config("DATABASE_URL", default="sqlite:///./database.db")
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+ASYNC_DATABASE_URL = config("ASYNC_DATABASE_URL", default=to_async_url(SQLALCHEMY_DATABASE_URL))
+
+# Pool settings (per engine; the async engine serves requests, the sync one scripts)
+DB_POOL_SIZE = config("DB_POOL_SIZE", cast=int, default=5)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", cast=int, default=10)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", cast=float, default=30.0)
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", cast=int, default=1800)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", cast=bool, default=True)
+
+# Connect-time PRAGMAs for SQLite: WAL lets readers run alongside a writer,
+# busy_timeout makes writers wait for the lock instead of failing with "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT_MS", cast=int, default=5000),
+    "cache_size": config("SQLITE_CACHE_SIZE", cast=int, default=-64000),
+    "mmap_size": config("SQLITE_MMAP_SIZE", cast=int, default=268435456),
+}
+
+def is_sqlite(url: str) -> bool:
+    return url.partition("://")[0].split("+")[0] == "sqlite"
+
+def is_sqlite_memory(url: str) -> bool:
+    return is_sqlite(url) and (url.partition("://")[2] in ("", "/", "/:memory:") or "mode=memory" in url)
+
+def engine_options(url: str, stats: PoolStats, pool_class) -> dict:
+    """create_engine kwargs for url: queue pool settings, or none for in-memory SQLite"""
+    options = {}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if is_sqlite_memory(url):
+            # In-memory databases keep SQLAlchemy's single-connection pool
+            return options
+    options.update(
+        poolclass=pool_class(stats),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+def build_engines(sync_url: str, async_url: str):
+    sync_stats, async_stats = PoolStats("sync"), PoolStats("async")
+    sync_engine = create_engine(sync_url, **engine_options(sync_url, sync_stats, sync_pool_class))
+    async_engine = create_async_engine(async_url, **engine_options(async_url, async_stats, async_pool_class))
+    for eng, stats, url in ((sync_engine, sync_stats, sync_url), (async_engine, async_stats, async_url)):
+        track_connections(eng, stats)
+        if is_sqlite(url) and not is_sqlite_memory(url):
+            install_sqlite_pragmas(eng, SQLITE_PRAGMAS)
+    return sync_engine, async_engine, {"sync": sync_stats, "async": async_stats}
+
+engine, async_engine, pool_stats = build_engines(SQLALCHEMY_DATABASE_URL, ASYNC_DATABASE_URL)
+
+# Sync engine: table creation, scripts and backfills
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: request handlers, so queries never block the event loop
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -14,4 +90,12 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_stats() -> dict:
+    """Checkout/wait statistics for both connection pools"""
+    return {name: stats.get_stats() for name, stats in pool_stats.items()}
@@ -0,0 +1,50 @@
+"""
+Schema migrations for existing databases
+
+create_all() only creates missing tables, so indexes added to a model later
+never reach a database.db created before them. Each migration here is
+idempotent and runs at startup; it can also be run by hand:
+
+    python -m app.models.migrations
+"""
+from sqlalchemy import inspect
+
+from app.models.database import engine as default_engine
+from app.models.blockchain import BlockchainTransaction
+from app.models.transaction import Transaction
+
+# Indexes declared on models that older databases may be missing
+MIGRATED_TABLES = [Transaction.__table__, BlockchainTransaction.__table__]
+
+
+def ensure_indexes(engine=default_engine) -> list:
+    """Create any model-declared index missing from an existing table"""
+    created = []
+    inspector = inspect(engine)
+    for table in MIGRATED_TABLES:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
+def run_migrations(engine=default_engine) -> list:
+    try:
+        created = ensure_indexes(engine)
+    except Exception as e:
+        print(f"Migration Error: {e}")
+        return []
+    if created:
+        # Refresh planner statistics so the new indexes get picked up
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    return created
+
+
+if __name__ == "__main__":
+    created = run_migrations()
+    print(f"Created indexes: {', '.join(created)}" if created else "Schema up to date")
@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Dict, Type
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    """Checkout counters and wait times for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def get_stats(self) -> Dict:
+        pool = self.pool
+        with self._lock:
+            checkouts = self.checkouts
+            stats = {
+                'pool': type(pool).__name__ if pool is not None else None,
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidated': self.invalidated,
+                'avg_wait_ms': round(self.total_wait_ms / checkouts, 3) if checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            })
+        return stats
+
+
+def timed_pool_class(base: Type[QueuePool], stats: PoolStats) -> Type[QueuePool]:
+    """
+    Subclass a queue pool so every checkout records how long it waited
+    Stats live on the class, so they survive pool.recreate() after dispose().
+    """
+
+    class TimedPool(base):
+        pool_stats = stats
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool_stats.pool = self
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except PoolTimeout:
+                self.pool_stats.record_wait(0.0, timed_out=True)
+                raise
+            self.pool_stats.record_wait((time.perf_counter() - started) * 1000)
+            return conn
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def sync_pool_class(stats: PoolStats) -> Type[QueuePool]:
+    return timed_pool_class(QueuePool, stats)
+
+def async_pool_class(stats: PoolStats) -> Type[QueuePool]:
+    return timed_pool_class(AsyncAdaptedQueuePool, stats)
+
+
+def install_sqlite_pragmas(engine, pragmas: Dict[str, object]):
+    """Apply PRAGMAs on every new SQLite connection (works for sync and async engines)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def track_connections(engine, stats: PoolStats):
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidated += 1
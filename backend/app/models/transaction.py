@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from app.models.database import Base
 from datetime import datetime
 
@@ -17,4 +17,9 @@ class Transaction(Base):
     status = Column(String, default="pending")
     fraud_score = Column(Integer, default=0)
     blockchain_tx_hash = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # History lookups: WHERE sender_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_transactions_sender_created", "sender_id", "created_at", "id"),
+    )
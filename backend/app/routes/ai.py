@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Any, Dict, Optional, List
 from pathlib import Path
@@ -7,7 +7,9 @@ import httpx
 from datetime import datetime
 
 # Use exchange rate + competitor config from rates router
-from app.routes.rates import exchange_service, COMPETITOR_DATA, _apply_overrides
+from app.routes.rates import exchange_service
+from app.services.competitors import competitor_store
+from app.services.http_clients import get_gemini_client
 
 router = APIRouter()
 
@@ -43,7 +45,10 @@ class OptimizeResponse(BaseModel):
 
 
 @router.post("/optimize", response_model=OptimizeResponse)
-async def optimize_remittance(payload: OptimizeRequest):
+async def optimize_remittance(
+    payload: OptimizeRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client)
+):
     """
     Server-side proxy to call Google Gemini and return a recommendation text.
     Requires GEMINI_API_KEY (or GOOGLE_API_KEY) to be set in env.
@@ -69,36 +74,28 @@ async def optimize_remittance(payload: OptimizeRequest):
     our_fee = amount * 0.015 + 2.0
     our_recipient_gets = (amount - our_fee) * our_rate
 
-    # Build competitor options from COMPETITOR_DATA
+    # Build competitor options from the current pricing snapshot
+    snapshot = competitor_store.current
     options: List[Dict[str, Any]] = []
     # Optionally restrict to available brands from caller
-    comp_pool = COMPETITOR_DATA
+    brands = None
     if payload.available_brands:
         allowed = set(b.strip().lower() for b in payload.available_brands if b and b.strip())
-        comp_pool = {k: v for k, v in COMPETITOR_DATA.items() if v['brand'].strip().lower() in allowed}
-
-    for name, data in comp_pool.items():
-        # Apply corridor/amount overrides if configured
-        markup, fixed_fee = _apply_overrides(data['brand'], payload.from_currency, payload.to_currency, amount, data['markup'], data['fixed_fee'])
-        comp_fee = amount * markup + fixed_fee
-        comp_rate = market_rate * (1 - markup)
-        comp_gets = (amount - comp_fee) * comp_rate
+        brands = {v['brand'] for v in snapshot.competitors.values() if v['brand'].strip().lower() in allowed}
+
+    # One vectorized pass (corridor/amount overrides applied if configured)
+    pricing = snapshot.price(payload.from_currency, payload.to_currency, amount, market_rate, brands=brands)
+    for option in pricing.to_dicts(sort=False):
         dist_km = None
         t_min = None
         if payload.brand_distances_km is not None:
-            dist_km = payload.brand_distances_km.get(data['brand'])
+            dist_km = payload.brand_distances_km.get(option['name'])
             if dist_km is not None:
                 # Rough local driving average: 40km/h
                 t_min = round((dist_km / 40.0) * 60.0, 1)
-        options.append({
-            'name': data['brand'],
-            'fee': round(comp_fee, 2),
-            'fee_percent': f"{(comp_fee / amount) * 100:.2f}%",
-            'exchange_rate': round(comp_rate, 6),
-            'recipient_gets': round(comp_gets, 2),
-            'distance_km': None if dist_km is None else round(dist_km, 2),
-            'time_min': t_min,
-        })
+        option['distance_km'] = None if dist_km is None else round(dist_km, 2)
+        option['time_min'] = t_min
+        options.append(option)
 
     # Add our service as well for transparency unless caller restricts to nearby brands
     if not payload.available_brands:
@@ -151,15 +148,14 @@ async def optimize_remittance(payload: OptimizeRequest):
     )
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "x-goog-api-key": api_key,
-                },
-                json={"contents": [{"parts": [{"text": prompt}]}]},
-            )
+        resp = await client.post(
+            url,
+            headers={
+                "Content-Type": "application/json",
+                "x-goog-api-key": api_key,
+            },
+            json={"contents": [{"parts": [{"text": prompt}]}]},
+        )
 
         if resp.status_code != 200:
             # Try to expose upstream error details
@@ -1,22 +1,16 @@
-from decouple import config
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
-import bcrypt
 import jwt
 
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.user import User
+from app.services.password_hasher import HasherOverloaded, password_hasher
+from app.utils.auth import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY, get_current_user, require_admin, token_cache
 
 router = APIRouter()
-security = HTTPBearer()
-
-# Configuration
-SECRET_KEY = config("SECRET_KEY", default="dev-do-not-use")
-ALGORITHM = config("ALGORITHM", default="HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int, default=60)
 
 # Pydantic models for request/response
 class UserRegister(BaseModel):
@@ -45,66 +39,47 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 # Utility functions
-def hash_password(password: str) -> str:
+# bcrypt runs on the hasher's thread pool so a login never blocks the event loop
+async def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    try:
+        return await password_hasher.hash(password)
+    except HasherOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly"
+        )
 
-def verify_password(password: str, hashed_password: str) -> bool:
+async def verify_password(password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    try:
+        return await password_hasher.verify(password, hashed_password)
+    except HasherOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly"
+        )
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Create JWT access token"""
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = issued_at + timedelta(minutes=15)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_user_from_token(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Extract user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-            
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
-
 # Routes
 @router.post("/register", response_model=Token)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -112,7 +87,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
     
     # Hash password and create user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     
     db_user = User(
         email=user_data.email,
@@ -122,13 +97,13 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.email},
+        data={"sub": db_user.email, "uid": db_user.id},
         expires_delta=access_token_expires
     )
     
@@ -144,11 +119,11 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
     
     # Find user
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await db.scalar(select(User).where(User.email == login_data.email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -156,7 +131,7 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(login_data.password, user.hashed_password):
+    if not await verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -165,7 +140,7 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data={"sub": user.email, "uid": user.id},
         expires_delta=access_token_expires
     )
     
@@ -181,12 +156,12 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.get("/profile", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_user_from_token)):
+async def get_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return current_user
 
 @router.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_user_from_token)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user info with transaction stats"""
     # You could add transaction statistics here
     return {
@@ -198,9 +173,19 @@ async def get_current_user_info(current_user: User = Depends(get_user_from_token
         "status": "active"
     }
 
+@router.get("/hasher-stats")
+async def get_hasher_stats(_: None = Depends(require_admin)):
+    """Password hashing pool queue depth and timings (admin only)"""
+    return password_hasher.get_stats()
+
+@router.get("/token-cache-stats")
+async def get_token_cache_stats(_: None = Depends(require_admin)):
+    """Verified-token cache hit rate and size (admin only)"""
+    return token_cache.get_stats()
+
 # Demo endpoint for testing
 @router.get("/demo-users")
-async def create_demo_users(db: Session = Depends(get_db)):
+async def create_demo_users(db: AsyncSession = Depends(get_async_db)):
     """Create demo users for testing (hackathon only!)"""
     
     demo_users = [
@@ -213,9 +198,9 @@ async def create_demo_users(db: Session = Depends(get_db)):
     
     for user_data in demo_users:
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data["email"]).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_data["email"]))
         if not existing_user:
-            hashed_password = hash_password(user_data["password"])
+            hashed_password = await hash_password(user_data["password"])
             
             db_user = User(
                 email=user_data["email"],
@@ -225,8 +210,8 @@ async def create_demo_users(db: Session = Depends(get_db)):
             )
             
             db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
+            await db.commit()
+            await db.refresh(db_user)
             
             created_users.append({
                 "email": db_user.email,
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.services.blockchain import BLOCKCHAIN_BATCH_MAX, blockchain_service
+from app.services.bulk_lookup import LookupTooLarge, iter_blockchain_statuses, parse_keys
+from app.utils.auth import Principal, get_current_principal
+
+router = APIRouter()
+
+class BlockchainTransferRequest(BaseModel):
+    # Strict: JSON true is not 1.0; Infinity/NaN are not amounts
+    amount: float = Field(strict=True, allow_inf_nan=False)
+    sender_address: str
+    recipient_address: str
+    network: Optional[str] = None
+    memo: Optional[str] = None
+
+class BlockchainBatchRequest(BaseModel):
+    network: str = "polygon"
+    transfers: List[BlockchainTransferRequest]
+
+@router.post("/transactions")
+async def send_blockchain_transfer(
+    transfer: BlockchainTransferRequest,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Submit one transfer to the (simulated) blockchain"""
+    if transfer.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be greater than 0")
+    return await blockchain_service.initiate_transaction(
+        transfer.amount, transfer.sender_address, transfer.recipient_address,
+        transfer.network or "polygon", transfer.memo
+    )
+
+@router.post("/transactions/batch")
+async def send_blockchain_batch(
+    batch: BlockchainBatchRequest,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Submit many transfers at once; results are per item, in request order"""
+    if not batch.transfers:
+        raise HTTPException(status_code=400, detail="No transfers in batch")
+    if len(batch.transfers) > BLOCKCHAIN_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BLOCKCHAIN_BATCH_MAX} transfers")
+    results = await blockchain_service.initiate_batch([t.model_dump() for t in batch.transfers], batch.network)
+    return {
+        'submitted': sum(1 for r in results if r['status'] == 'pending'),
+        'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+        'results': results,
+    }
+
+@router.post("/transactions/lookup")
+async def lookup_blockchain_transactions(request: Request):
+    """
+    Statuses for many hashes in one request
+    Body is a JSON list of hashes (or {"hashes": [...]}); results stream back
+    as NDJSON in input order, resolved from the hot set plus one IN query per chunk.
+    """
+    try:
+        hashes = parse_keys(await request.json(), "hashes", str)
+    except LookupTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e) or "Request body is not valid JSON")
+    return StreamingResponse(iter_blockchain_statuses(hashes, blockchain_service.get_transaction_statuses),
+                             media_type="application/x-ndjson")
+
+@router.get("/transactions/{tx_hash}")
+async def get_blockchain_transaction(tx_hash: str):
+    """Current status of one blockchain transaction"""
+    return await blockchain_service.get_transaction_status(tx_hash)
+
+@router.get("/networks")
+async def get_blockchain_networks():
+    return await blockchain_service.get_network_stats()
@@ -1,104 +1,21 @@
-from fastapi import APIRouter, HTTPException, Query
+from decouple import config
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import Dict, List, Optional
-import httpx
+from typing import Dict, List, Optional, Tuple
 import asyncio
 from datetime import datetime
-from pathlib import Path
-import json
 
-router = APIRouter()
-
-# --- Competitor config loading (data-driven) ---
-COMPETITOR_DATA: Dict[str, Dict] = {}
-BRAND_ALIASES: Dict[str, str] = {}
-BRAND_NAMES: List[str] = []
-BRAND_NAME_MAP: Dict[str, str] = {}
-DISTANCE_POLICY: Dict[str, float] = {"loss_weight": 0.45, "distance_weight": 0.55, "distance_cap_km": 10.0}
-OVERRIDES: List[Dict] = []
-
-def _fallback_competitors():
-    return {
-        'Western Union': {'markup': 0.055, 'fixed_fee': 5.99, 'brand': 'Western Union'},
-        'MoneyGram': {'markup': 0.048, 'fixed_fee': 4.99, 'brand': 'MoneyGram'},
-        'Remitly': {'markup': 0.035, 'fixed_fee': 2.99, 'brand': 'Remitly'},
-        'Wise': {'markup': 0.025, 'fixed_fee': 1.50, 'brand': 'Wise'},
-        'Ria': {'markup': 0.035, 'fixed_fee': 3.99, 'brand': 'Ria'},
-        'Xoom': {'markup': 0.040, 'fixed_fee': 3.99, 'brand': 'Xoom'},
-    }
-
-def _init_competitors():
-    global COMPETITOR_DATA, BRAND_ALIASES, BRAND_NAMES, BRAND_NAME_MAP, DISTANCE_POLICY, OVERRIDES
-    try:
-        cfg_path = Path(__file__).resolve().parents[1] / 'config' / 'competitors.json'
-        with cfg_path.open('r', encoding='utf-8') as f:
-            cfg = json.load(f)
-        comp = {}
-        aliases = {}
-        names = []
-        for item in cfg.get('brands', []):
-            brand = item.get('brand')
-            if not brand:
-                continue
-            comp[brand] = {
-                'markup': float(item.get('markup', 0.0)),
-                'fixed_fee': float(item.get('fixed_fee', 0.0)),
-                'brand': brand,
-            }
-            names.append(brand)
-            for al in item.get('aliases', []):
-                aliases[str(al).lower()] = brand
-        COMPETITOR_DATA = comp or _fallback_competitors()
-        BRAND_ALIASES = aliases
-        BRAND_NAMES = names or list(COMPETITOR_DATA.keys())
-        BRAND_NAME_MAP = {n.lower(): n for n in BRAND_NAMES}
-        dp = cfg.get('distance_policy') or {}
-        DISTANCE_POLICY = {
-            'loss_weight': float(dp.get('loss_weight', DISTANCE_POLICY['loss_weight'])),
-            'distance_weight': float(dp.get('distance_weight', DISTANCE_POLICY['distance_weight'])),
-            'distance_cap_km': float(dp.get('distance_cap_km', DISTANCE_POLICY['distance_cap_km'])),
-        }
-        OVERRIDES = cfg.get('overrides', []) or []
-    except Exception:
-        # Fallback to built-in defaults
-        COMPETITOR_DATA = _fallback_competitors()
-        BRAND_ALIASES = {
-            'western union': 'Western Union',
-            'moneygram': 'MoneyGram',
-            'remitly': 'Remitly',
-            'wise': 'Wise',
-            'transferwise': 'Wise',
-            'ria': 'Ria',
-            'ria money transfer': 'Ria',
-            'xoom': 'Xoom',
-        }
-        BRAND_NAMES = list(COMPETITOR_DATA.keys())
-        BRAND_NAME_MAP = {n.lower(): n for n in BRAND_NAMES}
-        OVERRIDES = []
+from app.services.competitors import competitor_store
+from app.services.rate_cache import rate_cache
+from app.services.rate_matrix import rate_matrix
+from app.services.rate_refresher import rate_refresher
+from app.utils.auth import require_admin
 
-_init_competitors()
+router = APIRouter()
 
-def _apply_overrides(brand: str, from_currency: str, to_currency: str, amount: float, markup: float, fixed_fee: float):
-    try:
-        for rule in OVERRIDES:
-            if rule.get('brand') and str(rule['brand']).lower() != brand.lower():
-                continue
-            if rule.get('from') and str(rule['from']).upper() != from_currency.upper():
-                continue
-            if rule.get('to') and str(rule['to']).upper() != to_currency.upper():
-                continue
-            amin = rule.get('amount_min'); amax = rule.get('amount_max')
-            if amin is not None and amount < float(amin):
-                continue
-            if amax is not None and amount > float(amax):
-                continue
-            if 'markup' in rule:
-                markup = float(rule['markup'])
-            if 'fixed_fee' in rule:
-                fixed_fee = float(rule['fixed_fee'])
-        return markup, fixed_fee
-    except Exception:
-        return markup, fixed_fee
+# Competitor pricing (brands, aliases, overrides) lives in an immutable snapshot
+# that is swapped atomically when competitors.json changes; read it per request
+# via competitor_store.current rather than caching it at import time.
 
 class ExchangeRateResponse(BaseModel):
     from_currency: str
@@ -148,52 +65,52 @@ SUPPORTED_CURRENCIES = {
     'NGN': {'name': 'Nigerian Naira', 'flag': '🇳🇬', 'destinations': ['US', 'EU', 'GB']},
 }
 
-# COMPETITOR_DATA, BRAND_ALIASES, BRAND_NAMES are loaded above
-
 # Exchange rate service class
 class ExchangeRateService:
     def __init__(self):
-        self.base_url = "https://api.exchangerate-api.com/v4/latest"
-        # Fallback rates for demo (in case API fails)
-        self.fallback_rates = {
-            'USD': {
-                'PHP': 56.50, 'MXN': 17.25, 'INR': 83.15, 'NGN': 790.00,
-                'EUR': 0.92, 'GBP': 0.79, 'CAD': 1.35, 'AUD': 1.52
-            },
-            'EUR': {
-                'USD': 1.08, 'PHP': 61.20, 'MXN': 18.70, 'INR': 89.80,
-                'NGN': 855.00, 'GBP': 0.86, 'CAD': 1.46, 'AUD': 1.64
-            },
-            'GBP': {
-                'USD': 1.26, 'EUR': 1.16, 'PHP': 71.30, 'MXN': 21.75,
-                'INR': 104.50, 'NGN': 995.00, 'CAD': 1.70, 'AUD': 1.91
-            }
-        }
+        # Shared per-base rate tables (one upstream fetch serves every target)
+        self.rate_cache = rate_cache
+        # Cross rates triangulated from the canonical base (static demo rates until the API answers)
+        self.rate_matrix = rate_matrix
         
     async def get_live_rate(self, from_currency: str, to_currency: str) -> float:
         """Fetch live exchange rate from API"""
         if from_currency == to_currency:
             return 1.0
-            
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/{from_currency}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if to_currency in data['rates']:
-                        return data['rates'][to_currency]
         
-        except Exception as e:
-            print(f"API Error: {e}")
+        # Warming the canonical table updates the matrix; every corridor reads from it
+        await self.rate_cache.get_table(self.rate_matrix.canonical_base)
+        rate = self.rate_matrix.cross_rate(from_currency, to_currency)
+        if rate is not None:
+            return rate
+        
+        # Currencies outside the matrix need their own base table
+        rate = await self.rate_cache.get_rate(from_currency, to_currency)
+        if rate is not None:
+            return rate
         
         # Fallback to mock rates
-        return self.fallback_rates.get(from_currency, {}).get(to_currency, 1.0)
+        return self.get_fallback_rate(from_currency, to_currency)
+    
+    def get_fallback_rate(self, from_currency: str, to_currency: str) -> float:
+        """Static demo rate, used when the live rate is unavailable or too slow"""
+        if from_currency == to_currency:
+            return 1.0
+        rate = self.rate_matrix.fallback_rate(from_currency, to_currency)
+        return rate if rate is not None else 1.0
     
     async def calculate_rates(self, from_currency: str, to_currency: str) -> Dict:
         """Calculate all rates with markups"""
         market_rate = await self.get_live_rate(from_currency, to_currency)
-        
+        return self.build_rates(from_currency, to_currency, market_rate)
+    
+    def calculate_fallback_rates(self, from_currency: str, to_currency: str) -> Dict:
+        """Same as calculate_rates, but from the static fallback table"""
+        market_rate = self.get_fallback_rate(from_currency, to_currency)
+        return self.build_rates(from_currency, to_currency, market_rate)
+    
+    def build_rates(self, from_currency: str, to_currency: str, market_rate: float) -> Dict:
+        """Apply our and typical competitor markups to a market rate"""
         # Our competitive rates (1.5% markup)
         our_markup = 0.015
         our_rate = market_rate * (1 - our_markup)
@@ -220,6 +137,30 @@ class ExchangeRateService:
 # Global service instance
 exchange_service = ExchangeRateService()
 
+# Corridor fan-out limits for the multi-rate endpoints
+RATE_FANOUT_CONCURRENCY = config("RATE_FANOUT_CONCURRENCY", cast=int, default=8)
+RATE_CALL_DEADLINE_SECONDS = config("RATE_CALL_DEADLINE_SECONDS", cast=float, default=2.0)
+
+async def calculate_rates_many(corridors: List[Tuple[str, str]]) -> List[Dict]:
+    """
+    Resolve many corridors concurrently (bounded by a semaphore)
+    A corridor that misses its deadline degrades to fallback rates instead of
+    stalling the whole response. Results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(RATE_FANOUT_CONCURRENCY)
+
+    async def resolve(from_currency: str, to_currency: str) -> Dict:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    exchange_service.calculate_rates(from_currency, to_currency),
+                    timeout=RATE_CALL_DEADLINE_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                return exchange_service.calculate_fallback_rates(from_currency, to_currency)
+
+    return await asyncio.gather(*(resolve(f, t) for f, t in corridors))
+
 # Routes
 @router.get("/currencies")
 async def get_supported_currencies():
@@ -239,6 +180,40 @@ async def get_supported_currencies():
         "note": "These are the currencies we support for remittance"
     }
 
+@router.get("/refresh-status")
+async def get_refresh_status():
+    """Background rate refresh status: last refresh time and latency per base"""
+    return rate_refresher.get_status()
+
+@router.get("/live/{from_currency}")
+async def get_live_rates(from_currency: str):
+    """Get live rates for a base currency against all supported currencies"""
+    
+    if from_currency.upper() not in SUPPORTED_CURRENCIES:
+        raise HTTPException(status_code=400, detail=f"Currency {from_currency} not supported")
+    
+    base_currency = from_currency.upper()
+    rates = {}
+    
+    # Get rates for all other currencies (one base table serves every target)
+    targets = [currency for currency in SUPPORTED_CURRENCIES if currency != base_currency]
+    results = await calculate_rates_many([(base_currency, currency) for currency in targets])
+    for currency, rate_data in zip(targets, results):
+        rates[currency] = {
+            'market_rate': rate_data['market_rate'],
+            'our_rate': rate_data['our_rate'],
+            'name': SUPPORTED_CURRENCIES[currency]['name'],
+            'flag': SUPPORTED_CURRENCIES[currency]['flag']
+        }
+    
+    return {
+        'base_currency': base_currency,
+        'base_currency_name': SUPPORTED_CURRENCIES[base_currency]['name'],
+        'rates': rates,
+        'last_updated': datetime.utcnow(),
+        'note': 'Our rates include 1.5% markup for sustainability'
+    }
+
 @router.get("/{from_currency}/{to_currency}", response_model=ExchangeRateResponse)
 async def get_exchange_rate(
     from_currency: str,
@@ -284,23 +259,13 @@ async def compare_rates(
     our_fee = amount * 0.015 + 2.0  # 1.5% + $2 fixed
     our_recipient_gets = (amount - our_fee) * rates['our_rate']
     
-    # Calculate for competitors
-    competitors = []
-    for name, data in COMPETITOR_DATA.items():
-        comp_fee = amount * data['markup'] + data['fixed_fee']
-        comp_rate = market_rate * (1 - data['markup'])
-        comp_recipient_gets = (amount - comp_fee) * comp_rate
-        
-        competitors.append({
-            'name': data['brand'],
-            'fee': round(comp_fee, 2),
-            'fee_percent': f"{(comp_fee / amount) * 100:.2f}%",
-            'exchange_rate': round(comp_rate, 6),
-            'recipient_gets': round(comp_recipient_gets, 2)
-        })
+    # Calculate for competitors (sorted best-first)
+    competitors = competitor_store.current.price(
+        from_currency.upper(), to_currency.upper(), amount, market_rate, overrides=False
+    ).to_dicts()
     
     # Calculate savings vs best competitor
-    best_competitor = max(competitors, key=lambda x: x['recipient_gets'])
+    best_competitor = competitors[0]
     savings_amount = our_recipient_gets - best_competitor['recipient_gets']
     savings_percent = (savings_amount / best_competitor['recipient_gets']) * 100
     
@@ -315,7 +280,7 @@ async def compare_rates(
             'exchange_rate': rates['our_rate'],
             'recipient_gets': round(our_recipient_gets, 2)
         },
-        competitors=sorted(competitors, key=lambda x: x['recipient_gets'], reverse=True),
+        competitors=competitors,
         savings={
             'amount': round(savings_amount, 2),
             'percent': f"{savings_percent:.1f}%",
@@ -335,24 +300,11 @@ async def nearby_channels(payload: NearbyChannelsRequest):
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Amount must be greater than 0")
 
-    # Normalize incoming store names to known brands
-    store_names = [s.strip().lower() for s in payload.stores if s and s.strip()]
+    snapshot = competitor_store.current
 
-    present_brands = set()
-    for s in store_names:
-        s_low = s.lower()
-        # Exact canonical brand match
-        if s_low in BRAND_NAME_MAP:
-            present_brands.add(BRAND_NAME_MAP[s_low])
-            continue
-        # Alias match
-        if s_low in BRAND_ALIASES:
-            present_brands.add(BRAND_ALIASES[s_low])
-            continue
-        # Fallback: containment check
-        for alias, canonical in BRAND_ALIASES.items():
-            if alias in s_low:
-                present_brands.add(canonical)
+    # Normalize incoming store names to known brands (exact name, alias, then
+    # any alias contained in the name, all aliases matched in one pass)
+    present_brands = snapshot.brand_matcher.match_all(payload.stores)
     if not present_brands:
         return NearbyChannelsResponse(channels=[], recommended=None)
 
@@ -366,79 +318,52 @@ async def nearby_channels(payload: NearbyChannelsRequest):
     our_fee = amount * 0.015 + 2.0
     our_recipient_gets = (amount - our_fee) * rates['our_rate']
 
-    channels: List[Dict] = []
-    for brand in present_brands:
-        data = COMPETITOR_DATA.get(brand)
-        if not data:
-            continue
-        # Apply optional overrides from config
-        markup, fixed_fee = _apply_overrides(brand, payload.from_currency, payload.to_currency, amount, data['markup'], data['fixed_fee'])
-        comp_fee = amount * markup + fixed_fee
-        comp_rate = market_rate * (1 - markup)
-        comp_recipient_gets = (amount - comp_fee) * comp_rate
-        channels.append({
-            'name': data['brand'],
-            'fee': round(comp_fee, 2),
-            'fee_percent': f"{(comp_fee / amount) * 100:.2f}%",
-            'exchange_rate': round(comp_rate, 6),
-            'recipient_gets': round(comp_recipient_gets, 2),
-            'our_baseline': {
-                'name': 'RemitEasy',
-                'fee': round(our_fee, 2),
-                'recipient_gets': round(our_recipient_gets, 2),
-            }
-        })
-
-    if not channels:
+    # Price present brands (with optional overrides from config), best-first:
+    # max recipient amount (equivalently lowest effective tax/fee)
+    pricing = snapshot.price(
+        payload.from_currency, payload.to_currency, amount, market_rate, brands=present_brands
+    )
+    if not pricing.names:
         return NearbyChannelsResponse(channels=[], recommended=None)
 
-    # Best channel: max recipient amount (equivalently lowest effective tax/fee)
-    channels_sorted = sorted(channels, key=lambda x: x['recipient_gets'], reverse=True)
+    our_baseline = {
+        'name': 'RemitEasy',
+        'fee': round(our_fee, 2),
+        'recipient_gets': round(our_recipient_gets, 2),
+    }
+    channels_sorted = [{**channel, 'our_baseline': our_baseline} for channel in pricing.to_dicts()]
     best = channels_sorted[0]
     return NearbyChannelsResponse(channels=channels_sorted, recommended=best)
 
 @router.get("/brands-config")
 async def get_brands_config():
     """Expose brands and alias rules so the frontend can stay in sync."""
+    snapshot = competitor_store.current
     # Build a simple alias map and search terms (brands + aliases)
-    aliases = BRAND_ALIASES
-    brands = BRAND_NAMES
+    aliases = dict(snapshot.brand_aliases)
+    brands = list(snapshot.brand_names)
     search_terms = list(dict.fromkeys(brands + list(aliases.keys())))
     return {
         'brands': brands,
         'aliases': aliases,
         'search_terms': search_terms,
-        'distance_policy': DISTANCE_POLICY,
+        'distance_policy': dict(snapshot.distance_policy),
+        'version': snapshot.version,
         'updated': datetime.utcnow(),
     }
 
-@router.get("/live/{from_currency}")
-async def get_live_rates(from_currency: str):
-    """Get live rates for a base currency against all supported currencies"""
-    
-    if from_currency.upper() not in SUPPORTED_CURRENCIES:
-        raise HTTPException(status_code=400, detail=f"Currency {from_currency} not supported")
-    
-    base_currency = from_currency.upper()
-    rates = {}
-    
-    # Get rates for all other currencies
-    for currency in SUPPORTED_CURRENCIES:
-        if currency != base_currency:
-            rate_data = await exchange_service.calculate_rates(base_currency, currency)
-            rates[currency] = {
-                'market_rate': rate_data['market_rate'],
-                'our_rate': rate_data['our_rate'],
-                'name': SUPPORTED_CURRENCIES[currency]['name'],
-                'flag': SUPPORTED_CURRENCIES[currency]['flag']
-            }
-    
+@router.post("/brands-config/reload")
+async def reload_brands_config(_: None = Depends(require_admin)):
+    """Reload competitors.json now and swap in the new pricing snapshot (admin only)"""
+    # Parsing and index compilation run in a worker thread, off the event loop
+    snapshot = await asyncio.to_thread(competitor_store.reload)
     return {
-        'base_currency': base_currency,
-        'base_currency_name': SUPPORTED_CURRENCIES[base_currency]['name'],
-        'rates': rates,
-        'last_updated': datetime.utcnow(),
-        'note': 'Our rates include 1.5% markup for sustainability'
+        'version': snapshot.version,
+        'source': snapshot.source,
+        'loaded_at': snapshot.loaded_at,
+        'brands': len(snapshot.names),
+        'overrides': len(snapshot.override_index),
+        'error': competitor_store.last_error,
     }
 
 @router.get("/popular")
@@ -455,9 +380,8 @@ async def get_popular_corridors():
     ]
     
     corridors = []
-    for from_curr, to_curr, description in popular_routes:
-        rates = await exchange_service.calculate_rates(from_curr, to_curr)
-        
+    all_rates = await calculate_rates_many([(f, t) for f, t, _ in popular_routes])
+    for (from_curr, to_curr, description), rates in zip(popular_routes, all_rates):
         # Sample calculation for $1000
         amount = 1000
         fee = amount * 0.015 + 2.0
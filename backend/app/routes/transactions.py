@@ -1,25 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
 import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.models.database import get_db
-from app.models.user import User
+from app.models.database import get_async_db
 from app.models.transaction import Transaction
+from app.models.user import User
 from app.services.fraud_detection import fraud_detector
+from app.services.fraud_features import fraud_features
+from app.services.fraud_rules import fraud_rules
+from app.services.events import blockchain_events, transaction_events
+from app.services.review_queue import REVIEW_STATUS, ReviewQueueFull, review_queue
 from app.services.exchange_rate import exchange_service
-from app.utils.auth import get_current_user
+from app.services.bulk_lookup import LookupTooLarge, iter_transaction_statuses, parse_keys
+from app.services.batch_quotes import BatchTooLarge, QuoteBatch, add_items, iter_ndjson_lines
+from app.services.status_stream import StatusWatch, TooManyTopics, transaction_status
+from app.utils.auth import Principal, get_current_principal, get_current_user, require_admin, token_cache
+from app.utils.helpers import decode_cursor, encode_cursor
 
 router = APIRouter()
 
+# Transaction status for each phase-one fraud decision
+FRAUD_DECISION_STATUS = {"allow": "pending", "review": REVIEW_STATUS, "block": "blocked"}
+
+# Push streams send a keep-alive after this long without events
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_MAX_SECONDS = 300.0
+
+HISTORY_PAGE_SIZE = 10
+HISTORY_MAX_PAGE_SIZE = 100
+
 class TransactionRequest(BaseModel):
     recipient_email: str
     recipient_name: str
     amount: float
     source_currency: str = "USD"
     target_currency: str = "PHP"
+    # Sender's offset from UTC in minutes (e.g. -300 for UTC-5); drives the nighttime rule
+    utc_offset_minutes: Optional[int] = Field(None, ge=-720, le=840)
 
 class QuoteRequest(BaseModel):
     amount: float
@@ -46,29 +70,70 @@ async def get_quote(quote: QuoteRequest):
         'rate_info': rate_info
     }
 
+@router.post("/quote/batch")
+async def get_batch_quote(request: Request):
+    """
+    Price many quotes in one request
+    Body is a JSON list of quotes (or {"quotes": [...]}), or NDJSON with
+    Content-Type application/x-ndjson. Quotes are grouped by corridor so each
+    rate is resolved once; results stream back as NDJSON in input order.
+    """
+    batch = QuoteBatch()
+    try:
+        if 'ndjson' in request.headers.get('content-type', ''):
+            async for item in iter_ndjson_lines(request.stream()):
+                if item is None:
+                    batch.add_error("Invalid quote: malformed JSON line")
+                else:
+                    batch.add(item)
+        else:
+            body = await request.json()
+            items = body.get('quotes') if isinstance(body, dict) else body
+            if not isinstance(items, list):
+                raise HTTPException(status_code=400, detail="Expected a list of quotes")
+            add_items(batch, items)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    
+    our_rates = await batch.resolve_rates(exchange_service.get_rate)
+    return StreamingResponse(batch.iter_ndjson(our_rates), media_type="application/x-ndjson")
+
 @router.post("/send")
 async def send_money(
     transaction: TransactionRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    # Full user row (one PK lookup) so a sender deleted elsewhere can't write while its token is cached
     current_user: User = Depends(get_current_user)
 ):
     """Send money with fraud detection"""
     
-    # Get user's transaction history
-    user_history = db.query(Transaction).filter(
-        Transaction.sender_id == current_user.id
-    ).order_by(Transaction.created_at.desc()).limit(20).all()
-    
-    # Run fraud detection
-    fraud_analysis = fraud_detector.calculate_fraud_score(
-        transaction.dict(),
-        user_history
+    # Phase one: fast score on precomputed per-sender features, with the rate
+    # lookup running alongside; slower checks happen later in the review queue
+    now = datetime.utcnow()
+    user_local_hour = None
+    if transaction.utc_offset_minutes is not None:
+        user_local_hour = (now + timedelta(minutes=transaction.utc_offset_minutes)).hour
+    sender_features, rate_info = await asyncio.gather(
+        fraud_features.get(db, current_user.id),
+        exchange_service.get_rate(transaction.source_currency, transaction.target_currency),
     )
+    is_new_recipient = await fraud_features.is_new_recipient(db, current_user.id, transaction.recipient_email)
     
-    # Get exchange rate
-    rate_info = await exchange_service.get_rate(
-        transaction.source_currency, 
-        transaction.target_currency
+    # Run fraud detection
+    fraud_analysis = fraud_detector.assess(
+        amount=transaction.amount,
+        from_currency=transaction.source_currency,
+        to_currency=transaction.target_currency,
+        is_new_recipient=is_new_recipient,
+        ip_country_mismatch=False,
+        device_change=False,
+        user_local_hour=user_local_hour,  # None skips the nighttime rule
+        features=sender_features.summary(now),
+        velocity=sender_features.velocity,
+        now=now,
+        sender_id=current_user.id,
     )
     
     # Calculate fees
@@ -86,18 +151,32 @@ async def send_money(
         target_currency=transaction.target_currency,
         exchange_rate=rate_info['our_rate'],
         fees=total_fees,
-        fraud_score=fraud_analysis['fraud_score'],
+        fraud_score=fraud_analysis['score'],
         blockchain_tx_hash=f"0x{secrets.token_hex(32)}",  # Mock blockchain hash
-        status="pending" if fraud_analysis['recommendation'] == 'APPROVE' else "review"
+        status=FRAUD_DECISION_STATUS[fraud_analysis['decision']]
     )
     
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
+    fraud_features.record(db_transaction)
+    
+    # Phase two: "review" transactions are queued and the client polls or streams the outcome
+    review_queued = False
+    if db_transaction.status == REVIEW_STATUS:
+        try:
+            review_queue.submit(db_transaction.id, fraud_analysis)
+            review_queued = True
+        except ReviewQueueFull as e:
+            # Stays in "review" and is picked up again on the next queue start
+            print(f"Review queue Error: {e}")
     
     return {
         'transaction_id': db_transaction.id,
         'status': db_transaction.status,
+        'review_queued': review_queued,
+        'status_url': f"/api/transactions/{db_transaction.id}/status",
+        'events_url': f"/api/transactions/{db_transaction.id}/events",
         'fraud_analysis': fraud_analysis,
         'blockchain_tx_hash': db_transaction.blockchain_tx_hash,
         'fees': total_fees,
@@ -106,29 +185,225 @@ async def send_money(
 
 @router.get("/history")
 async def get_transaction_history(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get user's transaction history"""
-    transactions = db.query(Transaction).filter(
-        Transaction.sender_id == current_user.id
-    ).order_by(Transaction.created_at.desc()).limit(10).all()
-    
+    """
+    Get user's transaction history, newest first
+    Keyset-paginated: pass the X-Next-Cursor header of one page as ?cursor= for the next.
+    """
+    query = (
+        select(Transaction)
+        .where(Transaction.sender_id == current_user.id)
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        try:
+            created_at, row_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Seek past the last row of the previous page via the (sender_id, created_at, id) index
+        query = query.where(or_(
+            Transaction.created_at < created_at,
+            and_(Transaction.created_at == created_at, Transaction.id < row_id),
+        ))
+
+    transactions = (await db.scalars(query)).all()
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
     return transactions
 
+@router.get("/fraud-rules")
+async def get_fraud_rules(_: None = Depends(require_admin)):
+    """Fraud rule sets, A/B split and per-rule hit counters and timings (admin only)"""
+    return fraud_rules.get_stats()
+
+@router.post("/fraud-rules/reload")
+async def reload_fraud_rules(_: None = Depends(require_admin)):
+    """Recompile fraud_rules.json and swap it in (admin only)"""
+    version = await asyncio.to_thread(fraud_rules.reload)
+    return {'version': version, 'last_error': fraud_rules.last_error}
+
+@router.get("/review-queue")
+async def get_review_queue_stats(_: None = Depends(require_admin)):
+    """Fraud review queue depth and throughput (admin only)"""
+    return {'queue': review_queue.get_stats(), 'events': transaction_events.get_stats(),
+            'blockchain_events': blockchain_events.get_stats()}
+
+async def _owned_transaction(db: AsyncSession, transaction_id: int, user: Principal) -> Transaction:
+    transaction = await db.scalar(
+        select(Transaction).where(
+            Transaction.id == transaction_id,
+            Transaction.sender_id == user.id
+        )
+    )
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
+@router.post("/lookup")
+async def lookup_transactions(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Statuses for many of your transactions in one request
+    Body is a JSON list of ids (or {"ids": [...]}); results stream back as
+    NDJSON in input order, with one IN query per chunk of ids.
+    """
+    try:
+        ids = parse_keys(await request.json(), "ids", int)
+    except LookupTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e) or "Request body is not valid JSON")
+    return StreamingResponse(iter_transaction_statuses(ids, current_user.id), media_type="application/x-ndjson")
+
+@router.get("/{transaction_id}/status")
+async def get_transaction_status(
+    transaction_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Poll a transaction's status (final is false while fraud review is pending)"""
+    return transaction_status(await _owned_transaction(db, transaction_id, current_user))
+
+def _sse(event: dict) -> str:
+    payload = {k: v for k, v in event.items() if k != 'event'}
+    return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+def _sse_response(watch: StatusWatch, snapshot: List[dict]) -> StreamingResponse:
+    """Stream the snapshot, then each change until every watched status is final"""
+    async def stream():
+        try:
+            for event in snapshot:
+                yield _sse(event)
+            deadline = asyncio.get_running_loop().time() + SSE_MAX_SECONDS
+            while not watch.done:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return
+                event = await watch.next(min(SSE_HEARTBEAT_SECONDS, remaining))
+                yield _sse(event) if event is not None else ": keep-alive\n\n"
+        finally:
+            watch.close()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/stream")
+async def stream_statuses(
+    ids: List[int] = Query([], description="Transaction ids (repeatable)"),
+    hashes: List[str] = Query([], description="Blockchain transaction hashes (repeatable)"),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Server-sent events for many transactions and blockchain hashes on one connection"""
+    if not ids and not hashes:
+        raise HTTPException(status_code=400, detail="Pass at least one ids or hashes parameter")
+    watch = StatusWatch(current_user.id)
+    try:
+        snapshot = await watch.add(ids, hashes)
+    except TooManyTopics as e:
+        watch.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    return _sse_response(watch, snapshot)
+
+@router.websocket("/ws")
+async def status_websocket(websocket: WebSocket, token: str = Query(...)):
+    """
+    WebSocket push channel: send {"subscribe": {"ids": [...], "hashes": [...]}}
+    (or "unsubscribe") at any time; status events arrive as JSON messages
+    """
+    user = await token_cache.verify(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    watch = StatusWatch(user.id)
+
+    async def receive():
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Expected a JSON object")
+                if 'unsubscribe' in message:
+                    watch.remove(*_ws_topics(message['unsubscribe']))
+                if 'subscribe' in message:
+                    for event in await watch.add(*_ws_topics(message['subscribe'])):
+                        await websocket.send_json(event)
+            except (TooManyTopics, TypeError, ValueError) as e:
+                await websocket.send_json({'event': 'error', 'detail': str(e)})
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            sender = asyncio.create_task(watch.next(SSE_HEARTBEAT_SECONDS))
+            await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                sender.cancel()
+                break
+            event = sender.result()
+            await websocket.send_json(event if event is not None else {'event': 'keep-alive'})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        watch.close()
+
+    error = None if receiver.cancelled() else receiver.exception()
+    if error is not None and not isinstance(error, WebSocketDisconnect):
+        # The receiver died on something other than the client leaving: don't leave the socket hanging
+        print(f"Status websocket Error: {error}")
+        try:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except Exception:
+            pass
+
+def _ws_topics(topics) -> Tuple[List[int], List[str]]:
+    """Validate a {"ids": [...], "hashes": [...]} WebSocket payload; ids are coerced to int"""
+    if topics is None:
+        return [], []
+    if not isinstance(topics, dict):
+        raise ValueError('Expected {"ids": [...], "hashes": [...]}')
+    ids = topics.get('ids') or []
+    hashes = topics.get('hashes') or []
+    if not isinstance(ids, list) or not isinstance(hashes, list):
+        raise ValueError("ids and hashes must be lists")
+    if not all(isinstance(h, str) for h in hashes):
+        raise ValueError("hashes must be strings")
+    try:
+        return [int(i) for i in ids], hashes
+    except (TypeError, ValueError):
+        raise ValueError("ids must be integers")
+
+@router.get("/{transaction_id}/events")
+async def stream_transaction_events(
+    transaction_id: int,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Server-sent events: the current status, then each change until it is final"""
+    watch = StatusWatch(current_user.id)
+    # add() reads the row with the sender_id check, so it doubles as the ownership check
+    snapshot = await watch.add([transaction_id])
+    if snapshot[0]['status'] == 'not_found':
+        watch.close()
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return _sse_response(watch, snapshot)
+
 @router.get("/{transaction_id}")
 async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get specific transaction details"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.sender_id == current_user.id
-    ).first()
-    
-    if not transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    return transaction
\ No newline at end of file
+    return await _owned_transaction(db, transaction_id, current_user)
\ No newline at end of file
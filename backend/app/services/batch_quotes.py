@@ -0,0 +1,139 @@
+import asyncio
+import json
+import math
+from array import array
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from decouple import config
+
+# Same fee structure as the single /quote endpoint (1.5% + $2 fixed)
+QUOTE_FEE_PERCENTAGE = 0.015
+QUOTE_FIXED_FEE = 2.0
+
+MAX_BATCH_QUOTES = config("MAX_BATCH_QUOTES", cast=int, default=100000)
+BATCH_STREAM_CHUNK = config("BATCH_STREAM_CHUNK", cast=int, default=1000)
+
+
+class BatchTooLarge(Exception):
+    pass
+
+
+class QuoteBatch:
+    """
+    Columnar accumulator for batch quotes
+
+    Each line is stored as (amount, corridor id) in compact arrays instead of
+    per-line dicts, so a payroll file of N lines costs a few bytes per line.
+    Rates are resolved once per distinct corridor and fees are computed in
+    chunks with NumPy while the NDJSON response streams out.
+    """
+
+    def __init__(self, max_quotes: int = MAX_BATCH_QUOTES):
+        self.max_quotes = max_quotes
+        self.amounts = array('d')
+        self.corridor_ids = array('q')
+        self.corridors: Dict[Tuple[str, str], int] = {}
+        self.errors: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def add(self, item) -> bool:
+        """Validate and append one quote line; invalid lines become error rows"""
+        if len(self) >= self.max_quotes:
+            raise BatchTooLarge(f"Batch exceeds {self.max_quotes} quotes")
+        try:
+            if isinstance(item['amount'], bool):
+                raise ValueError("amount must be a number")
+            amount = float(item['amount'])
+            source = str(item.get('source_currency', 'USD')).upper()
+            target = str(item.get('target_currency', 'PHP')).upper()
+            if not amount > 0 or not math.isfinite(amount):
+                raise ValueError("amount must be a finite number greater than 0")
+        except Exception as e:
+            return self.add_error(f"Invalid quote: {e}")
+
+        corridor_id = self.corridors.setdefault((source, target), len(self.corridors))
+        self.amounts.append(amount)
+        self.corridor_ids.append(corridor_id)
+        return True
+
+    def add_error(self, message: str) -> bool:
+        if len(self) >= self.max_quotes:
+            raise BatchTooLarge(f"Batch exceeds {self.max_quotes} quotes")
+        self.errors[len(self)] = message
+        self.amounts.append(float('nan'))
+        self.corridor_ids.append(-1)
+        return False
+
+    async def resolve_rates(self, get_rate: Callable[[str, str], Awaitable[Dict]]) -> np.ndarray:
+        """Look up our_rate once per distinct corridor (concurrently)"""
+        corridors = list(self.corridors.keys())
+        rate_infos = await asyncio.gather(*(get_rate(s, t) for s, t in corridors))
+        return np.array([info['our_rate'] for info in rate_infos], dtype=np.float64)
+
+    def iter_ndjson(self, our_rates: np.ndarray, chunk_size: int = BATCH_STREAM_CHUNK) -> Iterator[bytes]:
+        """Yield NDJSON result lines in input order, computing fees chunk by chunk"""
+        names = [None] * len(self.corridors)
+        for corridor, corridor_id in self.corridors.items():
+            names[corridor_id] = corridor
+
+        amounts = np.frombuffer(self.amounts, dtype=np.float64)
+        corridor_ids = np.frombuffer(self.corridor_ids, dtype=np.int64)
+        for start in range(0, len(amounts), chunk_size):
+            chunk_amounts = amounts[start:start + chunk_size]
+            chunk_ids = corridor_ids[start:start + chunk_size]
+            fees = chunk_amounts * QUOTE_FEE_PERCENTAGE + QUOTE_FIXED_FEE
+            rates = our_rates[np.maximum(chunk_ids, 0)] if len(our_rates) else np.zeros(len(chunk_ids))
+            received = (chunk_amounts - fees) * rates
+
+            lines = []
+            for k in range(len(chunk_amounts)):
+                index = start + k
+                if chunk_ids[k] < 0:
+                    row = {'index': index, 'error': self.errors.get(index, 'Invalid quote')}
+                else:
+                    source, target = names[chunk_ids[k]]
+                    row = {
+                        'index': index,
+                        'amount': float(chunk_amounts[k]),
+                        'source_currency': source,
+                        'target_currency': target,
+                        'fees': round(float(fees[k]), 2),
+                        'recipient_receives': round(float(received[k]), 2),
+                        'exchange_rate': float(rates[k]),
+                    }
+                lines.append(json.dumps(row))
+            yield ("\n".join(lines) + "\n").encode('utf-8')
+
+
+async def iter_ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Optional[Dict]]:
+    """Parse an NDJSON byte stream incrementally; malformed lines yield None"""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Optional[Dict]:
+    try:
+        item = json.loads(line)
+        return item if isinstance(item, dict) else None
+    except ValueError:
+        return None
+
+
+def add_items(batch: QuoteBatch, items: List) -> QuoteBatch:
+    """Fill a batch from an already-parsed JSON list"""
+    for item in items:
+        if isinstance(item, dict):
+            batch.add(item)
+        else:
+            batch.add_error("Invalid quote: expected an object")
+    return batch
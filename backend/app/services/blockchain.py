@@ -1,18 +1,30 @@
 import secrets
 import hashlib
+import math
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-import asyncio
+from typing import Dict, List, Optional, Tuple
 import json
 
+from decouple import config
+
+from app.services.blockchain_store import BlockchainStore, blockchain_store
+from app.services.confirmation_scheduler import ConfirmationScheduler
+
+BLOCKCHAIN_BATCH_MAX = config("BLOCKCHAIN_BATCH_MAX", cast=int, default=1000)
+
+
+class BlockchainBatchTooLarge(Exception):
+    pass
+
+
 class BlockchainService:
     """
     Mock blockchain service for hackathon demo
     Simulates blockchain transactions with realistic delays and confirmations
     """
     
-    def __init__(self):
+    def __init__(self, store: BlockchainStore = blockchain_store):
         # Mock network configurations
         self.networks = {
             'ethereum': {
@@ -35,9 +47,10 @@ class BlockchainService:
             }
         }
         
-        # Mock transaction storage (in production, this would be a database)
-        self.pending_transactions = {}
-        self.confirmed_transactions = {}
+        # Persistent transaction storage (blockchain_transactions table + hot set)
+        self.store = store
+        # One heap-driven task confirms every pending transaction when it comes due
+        self.scheduler = ConfirmationScheduler(self.store.mark_confirmed_many)
     
     def generate_transaction_hash(self, transaction_data: Dict) -> str:
         """Generate a realistic-looking transaction hash"""
@@ -49,6 +62,15 @@ class BlockchainService:
         tx_hash = hashlib.sha256(hash_input).hexdigest()
         return f"0x{tx_hash}"
     
+    @staticmethod
+    def gas_multiplier(amount: Optional[float]) -> float:
+        """Amount tier: higher amounts might need slightly more gas (very simplified)"""
+        if amount and amount > 10000:
+            return 1.2
+        if amount and amount > 5000:
+            return 1.1
+        return 1.0
+    
     def estimate_gas_fee(self, network: str = 'polygon', amount: float = None) -> Dict:
         """Estimate gas fees for transaction"""
         if network not in self.networks:
@@ -60,13 +82,7 @@ class BlockchainService:
         base_fee = net_config['gas_fee_range'][0]
         max_fee = net_config['gas_fee_range'][1]
         
-        # Higher amounts might need slightly more gas (very simplified)
-        if amount and amount > 10000:
-            multiplier = 1.2
-        elif amount and amount > 5000:
-            multiplier = 1.1
-        else:
-            multiplier = 1.0
+        multiplier = self.gas_multiplier(amount)
         
         estimated_fee = base_fee * multiplier
         
@@ -105,66 +121,137 @@ class BlockchainService:
         gas_info = self.estimate_gas_fee(network, amount)
         
         # Create transaction record
-        transaction_record = {
+        transaction_record = self._pending_record(tx_hash, net_config, gas_info['estimated_fee_usd'], amount,
+                                                  sender_address, recipient_address, transaction_data['memo'],
+                                                  datetime.utcnow())
+        
+        # Store as pending
+        await self.store.add(transaction_record)
+        
+        # Simulate blockchain processing delay
+        self._schedule_confirmation(transaction_record)
+        
+        return self._submission_result(transaction_record, net_config)
+    
+    def _pending_record(self, tx_hash: str, net_config: Dict, gas_fee: float, amount: float,
+                        sender_address: str, recipient_address: str, memo: str, initiated_at: datetime) -> Dict:
+        return {
             'hash': tx_hash,
             'status': 'pending',
             'network': net_config['name'],
             'amount': amount,
             'sender_address': sender_address,
             'recipient_address': recipient_address,
-            'gas_fee': gas_info['estimated_fee_usd'],
+            'gas_fee': gas_fee,
             'confirmation_time': net_config['avg_confirmation_time'],
             'confirmations': 0,
             'required_confirmations': 12,  # Standard for most networks
-            'initiated_at': datetime.utcnow(),
-            'memo': transaction_data['memo'],
+            'initiated_at': initiated_at,
+            'memo': memo,
             'explorer_url': f"{net_config['explorer_url']}{tx_hash}"
         }
-        
-        # Store as pending
-        self.pending_transactions[tx_hash] = transaction_record
-        
-        # Simulate blockchain processing delay
-        asyncio.create_task(self._simulate_confirmation(tx_hash))
-        
+    
+    @staticmethod
+    def _submission_result(record: Dict, net_config: Dict) -> Dict:
         return {
-            'transaction_hash': tx_hash,
+            'transaction_hash': record['hash'],
             'status': 'pending',
             'network': net_config['name'],
             'estimated_confirmation_time': f"{net_config['avg_confirmation_time']} seconds",
-            'gas_fee_usd': gas_info['estimated_fee_usd'],
-            'explorer_url': transaction_record['explorer_url'],
-            'initiated_at': transaction_record['initiated_at']
+            'gas_fee_usd': record['gas_fee'],
+            'explorer_url': record['explorer_url'],
+            'initiated_at': record['initiated_at']
         }
     
-    async def _simulate_confirmation(self, tx_hash: str):
-        """Simulate blockchain confirmation process"""
-        if tx_hash not in self.pending_transactions:
-            return
-        
-        transaction = self.pending_transactions[tx_hash]
-        confirmation_time = transaction['confirmation_time']
-        
-        # Wait for "blockchain confirmation"
-        await asyncio.sleep(confirmation_time)
+    async def initiate_batch(self, transfers: List[Dict], network: str = 'polygon') -> List[Dict]:
+        """
+        Initiate many transactions at once (e.g. a payout batch to one corridor)
+        Each transfer has amount, sender_address, recipient_address and optionally
+        network and memo. Gas is estimated once per (network, amount tier), all
+        records are inserted in one statement, and results come back in input
+        order; invalid transfers get status "rejected" with an error.
+        """
+        if len(transfers) > BLOCKCHAIN_BATCH_MAX:
+            raise BlockchainBatchTooLarge(f"Batch exceeds {BLOCKCHAIN_BATCH_MAX} transfers")
         
-        # Move to confirmed
-        transaction['status'] = 'confirmed'
-        transaction['confirmations'] = transaction['required_confirmations']
-        transaction['confirmed_at'] = datetime.utcnow()
+        initiated_at = datetime.utcnow()
+        stamp = f"{time.time()}_{secrets.token_hex(4)}"
+        gas_fees: Dict[Tuple[str, float], float] = {}
+        results: List[Dict] = []
+        records: List[Dict] = []
         
-        self.confirmed_transactions[tx_hash] = transaction
+        for index, transfer in enumerate(transfers):
+            amount = transfer.get('amount')
+            sender_address = transfer.get('sender_address')
+            recipient_address = transfer.get('recipient_address')
+            if not sender_address or not recipient_address:
+                results.append({'index': index, 'status': 'rejected',
+                                'error': 'sender_address and recipient_address are required'})
+                continue
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)) \
+                    or not math.isfinite(amount) or not amount > 0:
+                results.append({'index': index, 'status': 'rejected',
+                                'error': 'amount must be a finite number greater than 0'})
+                continue
+            
+            net_name = transfer.get('network') or network
+            if net_name not in self.networks:
+                net_name = 'polygon'
+            net_config = self.networks[net_name]
+            tier = (net_name, self.gas_multiplier(amount))
+            if tier not in gas_fees:
+                gas_fees[tier] = self.estimate_gas_fee(net_name, amount)['estimated_fee_usd']
+            
+            # Batch stamp + index keeps hashes unique without a clock read per transfer
+            tx_hash = "0x" + hashlib.sha256(
+                f"{amount}_{sender_address}_{recipient_address}_{stamp}_{index}".encode('utf-8')
+            ).hexdigest()
+            record = self._pending_record(tx_hash, net_config, gas_fees[tier], amount, sender_address,
+                                          recipient_address, transfer.get('memo') or f"Remittance ${amount}",
+                                          initiated_at)
+            records.append(record)
+            results.append({'index': index, **self._submission_result(record, net_config)})
         
-        # Remove from pending (in production, you'd keep a full history)
-        if tx_hash in self.pending_transactions:
-            del self.pending_transactions[tx_hash]
+        await self.store.add_many(records)
+        for record in records:
+            self._schedule_confirmation(record)
+        return results
+    
+    def _schedule_confirmation(self, tx: Dict):
+        """Simulate blockchain confirmation: due confirmation_time after initiation"""
+        due = tx['initiated_at'] + timedelta(seconds=tx['confirmation_time'] or 0)
+        self.scheduler.schedule(tx['hash'], (due - datetime(1970, 1, 1)).total_seconds())
+    
+    async def resume_pending(self, page_size: int = 500) -> int:
+        """Re-schedule confirmations for transactions still pending from a previous run"""
+        resumed = 0
+        after = None
+        while True:
+            records = await self.store.by_status('pending', limit=page_size, after=after)
+            for tx in records:
+                self._schedule_confirmation(tx)
+                resumed += 1
+            if len(records) < page_size:
+                return resumed
+            after = (records[-1]['initiated_at'], records[-1]['hash'])
     
-    def get_transaction_status(self, tx_hash: str) -> Dict:
+    async def shutdown(self):
+        """Stop confirming (pending transactions resume from the table on restart)"""
+        await self.scheduler.stop()
+    
+    async def get_transaction_status(self, tx_hash: str) -> Dict:
         """Get current status of a transaction"""
-        
+        return self._status_from_record(tx_hash, await self.store.get(tx_hash))
+    
+    async def get_transaction_statuses(self, tx_hashes: List[str]) -> List[Dict]:
+        """Statuses for many hashes, in input order, with one store lookup for the batch"""
+        records = await self.store.get_many(tx_hashes)
+        return [self._status_from_record(tx_hash, records.get(tx_hash)) for tx_hash in tx_hashes]
+    
+    @staticmethod
+    def _status_from_record(tx_hash: str, tx: Optional[Dict]) -> Dict:
         # Check pending transactions
-        if tx_hash in self.pending_transactions:
-            tx = self.pending_transactions[tx_hash]
+        if tx is not None and tx['status'] == 'pending':
             elapsed_time = (datetime.utcnow() - tx['initiated_at']).total_seconds()
             
             return {
@@ -178,8 +265,7 @@ class BlockchainService:
             }
         
         # Check confirmed transactions
-        if tx_hash in self.confirmed_transactions:
-            tx = self.confirmed_transactions[tx_hash]
+        if tx is not None and tx['status'] == 'confirmed':
             return {
                 'transaction_hash': tx_hash,
                 'status': 'confirmed',
@@ -236,12 +322,14 @@ class BlockchainService:
             'last_updated': datetime.utcnow()
         }
     
-    def get_network_stats(self) -> Dict:
+    async def get_network_stats(self) -> Dict:
         """Get current network statistics for demo"""
+        counts = await self.store.count_by_status()
         return {
             'supported_networks': list(self.networks.keys()),
-            'total_pending_transactions': len(self.pending_transactions),
-            'total_confirmed_transactions': len(self.confirmed_transactions),
+            'total_pending_transactions': counts.get('pending', 0),
+            'total_confirmed_transactions': counts.get('confirmed', 0),
+            'confirmation_scheduler': self.scheduler.get_stats(),
             'recommended_network': 'polygon',  # Cheapest and fastest
             'network_details': {
                 name: {
@@ -261,9 +349,9 @@ async def send_blockchain_transaction(amount: float, sender: str, recipient: str
     """Send a transaction on the blockchain"""
     return await blockchain_service.initiate_transaction(amount, sender, recipient, network)
 
-def get_transaction_status(tx_hash: str) -> Dict:
+async def get_transaction_status(tx_hash: str) -> Dict:
     """Get transaction status"""
-    return blockchain_service.get_transaction_status(tx_hash)
+    return await blockchain_service.get_transaction_status(tx_hash)
 
 def create_wallet_address(user_id: int) -> str:
     """Create wallet address for user"""
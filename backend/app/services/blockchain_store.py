@@ -0,0 +1,216 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from app.models.blockchain import BlockchainTransaction
+from app.models.database import AsyncSessionLocal
+
+BLOCKCHAIN_HOT_SET_SIZE = config("BLOCKCHAIN_HOT_SET_SIZE", cast=int, default=10000)
+BLOCKCHAIN_HOT_TTL_SECONDS = config("BLOCKCHAIN_HOT_TTL_SECONDS", cast=float, default=2.0)
+
+FINAL_STATUSES = {"confirmed", "failed"}
+
+
+class BlockchainStore:
+    """
+    Blockchain transactions persisted in the blockchain_transactions table
+
+    The table is the source of truth, so records survive restarts and are
+    shared by every worker process. Recently used records sit in an LRU hot
+    set of at most max_entries hashes; records in a final status are served
+    from it indefinitely, pending ones for ttl_seconds (another worker may
+    have confirmed them since).
+    """
+
+    def __init__(self, max_entries: int = BLOCKCHAIN_HOT_SET_SIZE, ttl_seconds: float = BLOCKCHAIN_HOT_TTL_SECONDS,
+                 session_factory=AsyncSessionLocal):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        # hash -> (record, monotonic time cached), in LRU order
+        self._hot: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    def _cache(self, record: Dict):
+        self._hot[record['hash']] = (record, time.monotonic())
+        self._hot.move_to_end(record['hash'])
+        while len(self._hot) > self.max_entries:
+            self._hot.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _cached(self, tx_hash: str) -> Optional[Dict]:
+        entry = self._hot.get(tx_hash)
+        if entry is None:
+            return None
+        record, cached_at = entry
+        if record['status'] not in FINAL_STATUSES and time.monotonic() - cached_at >= self.ttl_seconds:
+            return None
+        self._hot.move_to_end(tx_hash)
+        return record
+
+    async def add(self, record: Dict) -> Dict:
+        """Persist a new transaction record (keys as BlockchainTransaction.to_record())"""
+        row = BlockchainTransaction(
+            tx_hash=record['hash'],
+            status=record['status'],
+            network=record['network'],
+            amount=record['amount'],
+            sender_address=record['sender_address'],
+            recipient_address=record['recipient_address'],
+            gas_fee=record['gas_fee'],
+            confirmation_time=record['confirmation_time'],
+            confirmations=record['confirmations'],
+            required_confirmations=record['required_confirmations'],
+            memo=record['memo'],
+            explorer_url=record['explorer_url'],
+            initiated_at=record['initiated_at'],
+        )
+        async with self.session_factory() as db:
+            db.add(row)
+            await db.commit()
+        self.stats['writes'] += 1
+        stored = row.to_record()
+        self._cache(stored)
+        return stored
+
+    async def add_many(self, records: List[Dict]) -> int:
+        """Persist a batch of new records with one executemany INSERT"""
+        if not records:
+            return 0
+        rows = [{
+            'tx_hash': r['hash'], 'status': r['status'], 'network': r['network'], 'amount': r['amount'],
+            'sender_address': r['sender_address'], 'recipient_address': r['recipient_address'],
+            'gas_fee': r['gas_fee'], 'confirmation_time': r['confirmation_time'],
+            'confirmations': r['confirmations'], 'required_confirmations': r['required_confirmations'],
+            'memo': r['memo'], 'explorer_url': r['explorer_url'], 'initiated_at': r['initiated_at'],
+        } for r in records]
+        async with self.session_factory() as db:
+            await db.execute(insert(BlockchainTransaction), rows)
+            await db.commit()
+        self.stats['writes'] += len(records)
+        for record in records:
+            self._cache({**record, 'confirmed_at': None})
+        return len(records)
+
+    async def get(self, tx_hash: str) -> Optional[Dict]:
+        """Record by hash: hot set first, then the unique tx_hash index"""
+        record = self._cached(tx_hash)
+        if record is not None:
+            self.stats['hits'] += 1
+            return record
+        self.stats['misses'] += 1
+        async with self.session_factory() as db:
+            row = await db.scalar(select(BlockchainTransaction).where(BlockchainTransaction.tx_hash == tx_hash))
+        if row is None:
+            self._hot.pop(tx_hash, None)
+            return None
+        record = row.to_record()
+        self._cache(record)
+        return record
+
+    async def get_many(self, tx_hashes: List[str]) -> Dict[str, Dict]:
+        """Records by hash for a batch: hot set first, then one IN query for the misses"""
+        found: Dict[str, Dict] = {}
+        misses = []
+        for tx_hash in tx_hashes:
+            record = self._cached(tx_hash)
+            if record is not None:
+                found[tx_hash] = record
+            else:
+                misses.append(tx_hash)
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(misses)
+        if misses:
+            async with self.session_factory() as db:
+                rows = (await db.scalars(
+                    select(BlockchainTransaction).where(BlockchainTransaction.tx_hash.in_(misses))
+                )).all()
+            for row in rows:
+                record = row.to_record()
+                self._cache(record)
+                found[record['hash']] = record
+        return found
+
+    async def mark_confirmed(self, tx_hash: str, confirmed_at: Optional[datetime] = None) -> bool:
+        """
+        Move a pending transaction to confirmed
+        Conditional on it still being pending, so concurrent workers confirm it once; returns whether this call did.
+        """
+        confirmed_at = confirmed_at or datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(BlockchainTransaction)
+                .where(BlockchainTransaction.tx_hash == tx_hash, BlockchainTransaction.status == "pending")
+                .values(status="confirmed", confirmations=BlockchainTransaction.required_confirmations,
+                        confirmed_at=confirmed_at)
+            )
+            await db.commit()
+        self._hot.pop(tx_hash, None)
+        if result.rowcount:
+            self.stats['writes'] += 1
+        return bool(result.rowcount)
+
+    async def mark_confirmed_many(self, tx_hashes: List[str],
+                                  confirmed_at: Optional[datetime] = None) -> List[str]:
+        """
+        Bulk mark_confirmed: one UPDATE for the whole batch
+        Returns the hashes this call actually moved out of pending.
+        """
+        if not tx_hashes:
+            return []
+        confirmed_at = confirmed_at or datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(BlockchainTransaction)
+                .where(BlockchainTransaction.tx_hash.in_(tx_hashes), BlockchainTransaction.status == "pending")
+                .values(status="confirmed", confirmations=BlockchainTransaction.required_confirmations,
+                        confirmed_at=confirmed_at)
+                .returning(BlockchainTransaction.tx_hash)
+            )
+            confirmed = list(result.scalars())
+            await db.commit()
+        for tx_hash in tx_hashes:
+            self._hot.pop(tx_hash, None)
+        self.stats['writes'] += len(confirmed)
+        return confirmed
+
+    async def by_status(self, status: str, limit: int = 100,
+                        after: Optional[Tuple[datetime, str]] = None) -> List[Dict]:
+        """
+        Oldest-first records in a status via the (status, initiated_at) index
+        Pass the last record's (initiated_at, hash) as after= to fetch the next page.
+        """
+        query = (
+            select(BlockchainTransaction)
+            .where(BlockchainTransaction.status == status)
+            .order_by(BlockchainTransaction.initiated_at, BlockchainTransaction.tx_hash)
+            .limit(limit)
+        )
+        if after is not None:
+            initiated_at, tx_hash = after
+            query = query.where(or_(
+                BlockchainTransaction.initiated_at > initiated_at,
+                and_(BlockchainTransaction.initiated_at == initiated_at, BlockchainTransaction.tx_hash > tx_hash),
+            ))
+        async with self.session_factory() as db:
+            rows = (await db.scalars(query)).all()
+        return [row.to_record() for row in rows]
+
+    async def count_by_status(self) -> Dict[str, int]:
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(BlockchainTransaction.status, func.count(BlockchainTransaction.id))
+                .group_by(BlockchainTransaction.status)
+            )).all()
+        return {status: count for status, count in rows}
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'hot_entries': len(self._hot), 'max_entries': self.max_entries}
+
+
+# Global store used by BlockchainService
+blockchain_store = BlockchainStore()
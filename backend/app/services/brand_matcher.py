@@ -0,0 +1,104 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from decouple import config
+
+BRAND_MATCH_CACHE_SIZE = config("BRAND_MATCH_CACHE_SIZE", cast=int, default=4096)
+
+
+class AliasAutomaton:
+    """
+    Aho-Corasick automaton over the brand alias table
+
+    All aliases are matched in a single left-to-right pass over the text,
+    instead of one substring scan per alias.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # patterns: alias -> canonical brand
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[str, ...]] = [()]
+
+        for alias, canonical in patterns.items():
+            if alias:
+                self._insert(alias, canonical)
+        self._link()
+
+    def _insert(self, alias: str, canonical: str):
+        node = 0
+        for ch in alias:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            node = nxt
+        self.output[node] = self.output[node] + (canonical,)
+
+    def _link(self):
+        # Breadth-first so every fail target is finished before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text: str) -> Set[str]:
+        """Canonical brands of every alias that occurs anywhere in text"""
+        found: Set[str] = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+class BrandMatcher:
+    """
+    Normalize store names (e.g. Mapbox POIs) to known competitor brands
+
+    Exact brand name or alias matches win; otherwise every alias contained in
+    the store name counts. Results are memoized per store string.
+    """
+
+    def __init__(self, brand_name_map: Dict[str, str], aliases: Dict[str, str],
+                 cache_size: int = BRAND_MATCH_CACHE_SIZE):
+        self.brand_name_map = dict(brand_name_map)
+        self.aliases = dict(aliases)
+        self.automaton = AliasAutomaton(self.aliases)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, store_name: str) -> FrozenSet[str]:
+        s_low = store_name.strip().lower()
+        if not s_low:
+            return frozenset()
+        # Exact canonical brand match
+        if s_low in self.brand_name_map:
+            return frozenset((self.brand_name_map[s_low],))
+        # Alias match
+        if s_low in self.aliases:
+            return frozenset((self.aliases[s_low],))
+        # Fallback: containment of any alias
+        return frozenset(self.automaton.find(s_low))
+
+    def match_all(self, store_names: Iterable[str]) -> Set[str]:
+        """Union of brands present across a list of store names"""
+        present: Set[str] = set()
+        for name in store_names:
+            if name:
+                present.update(self.match(name))
+        return present
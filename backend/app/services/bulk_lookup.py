@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+from decouple import config
+from sqlalchemy import select
+
+from app.models.database import AsyncSessionLocal
+from app.models.transaction import Transaction
+from app.services.status_stream import transaction_status
+
+BULK_LOOKUP_MAX = config("BULK_LOOKUP_MAX", cast=int, default=10000)
+# Keys per IN query (well under SQLite's bound-parameter limit)
+BULK_LOOKUP_CHUNK = config("BULK_LOOKUP_CHUNK", cast=int, default=500)
+
+
+class LookupTooLarge(Exception):
+    pass
+
+
+_KEY_TYPES = {int: "integers", str: "strings"}
+
+
+def parse_keys(body, field: str, cast: Callable, max_keys: int = BULK_LOOKUP_MAX) -> List:
+    """
+    Keys from a JSON list or {field: [...]} body, de-duplicated in order
+    Raises ValueError for a malformed body and LookupTooLarge past max_keys.
+    """
+    items = body.get(field) if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise ValueError(f"Expected a list of {field}")
+    try:
+        keys = list(dict.fromkeys(cast(item) for item in items))
+    except (TypeError, ValueError):
+        # Don't echo the cast's own message (it quotes the raw input)
+        raise ValueError(f"{field} must be {_KEY_TYPES.get(cast, 'valid keys')}")
+    if len(keys) > max_keys:
+        raise LookupTooLarge(f"Lookup exceeds {max_keys} {field}")
+    return keys
+
+
+def _ndjson_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_lines(rows: List[Dict]) -> bytes:
+    return "".join(json.dumps(row, default=_ndjson_default) + "\n" for row in rows).encode("utf-8")
+
+
+async def iter_transaction_statuses(ids: List[int], user_id: int,
+                                    chunk_size: int = BULK_LOOKUP_CHUNK) -> AsyncIterator[bytes]:
+    """NDJSON statuses for the user's transaction ids, one IN query per chunk, in input order"""
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        async with AsyncSessionLocal() as db:
+            found = {t.id: t for t in (await db.scalars(
+                select(Transaction).where(Transaction.id.in_(chunk), Transaction.sender_id == user_id)
+            )).all()}
+        yield ndjson_lines([
+            transaction_status(found[i]) if i in found
+            else {'transaction_id': i, 'status': 'not_found', 'error': 'Transaction not found'}
+            for i in chunk
+        ])
+
+
+async def iter_blockchain_statuses(hashes: List[str], lookup: Callable[[List[str]], Awaitable[List[Dict]]],
+                                   chunk_size: int = BULK_LOOKUP_CHUNK) -> AsyncIterator[bytes]:
+    """NDJSON statuses for blockchain hashes, one lookup(chunk) call per chunk, in input order"""
+    for start in range(0, len(hashes), chunk_size):
+        yield ndjson_lines(await lookup(hashes[start:start + chunk_size]))
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from decouple import config
+
+from app.services.brand_matcher import BrandMatcher
+from app.services.overrides import OverrideIndex
+from app.services.pricing import PricingResult, price_channels
+
+COMPETITORS_CONFIG_PATH = Path(__file__).resolve().parents[1] / 'config' / 'competitors.json'
+COMPETITORS_WATCH_ENABLED = config("COMPETITORS_WATCH_ENABLED", cast=bool, default=True)
+COMPETITORS_WATCH_INTERVAL_SECONDS = config("COMPETITORS_WATCH_INTERVAL_SECONDS", cast=float, default=5.0)
+
+DEFAULT_DISTANCE_POLICY = {"loss_weight": 0.45, "distance_weight": 0.55, "distance_cap_km": 10.0}
+
+
+def _fallback_competitors():
+    return {
+        'Western Union': {'markup': 0.055, 'fixed_fee': 5.99, 'brand': 'Western Union'},
+        'MoneyGram': {'markup': 0.048, 'fixed_fee': 4.99, 'brand': 'MoneyGram'},
+        'Remitly': {'markup': 0.035, 'fixed_fee': 2.99, 'brand': 'Remitly'},
+        'Wise': {'markup': 0.025, 'fixed_fee': 1.50, 'brand': 'Wise'},
+        'Ria': {'markup': 0.035, 'fixed_fee': 3.99, 'brand': 'Ria'},
+        'Xoom': {'markup': 0.040, 'fixed_fee': 3.99, 'brand': 'Xoom'},
+    }
+
+def _fallback_aliases():
+    return {
+        'western union': 'Western Union',
+        'moneygram': 'MoneyGram',
+        'remitly': 'Remitly',
+        'wise': 'Wise',
+        'transferwise': 'Wise',
+        'ria': 'Ria',
+        'ria money transfer': 'Ria',
+        'xoom': 'Xoom',
+    }
+
+
+def _readonly(values: List[float]) -> np.ndarray:
+    arr = np.array(values, dtype=np.float64)
+    arr.setflags(write=False)
+    return arr
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """
+    Immutable, versioned view of competitors.json plus its precomputed indexes
+
+    Readers grab one snapshot per request and use it throughout, so a reload
+    in the middle of a request can never mix old and new pricing.
+    """
+    version: int
+    source: str
+    loaded_at: datetime
+    mtime: Optional[float]
+    competitors: Mapping[str, Mapping]
+    brand_aliases: Mapping[str, str]
+    brand_names: Tuple[str, ...]
+    brand_name_map: Mapping[str, str]
+    distance_policy: Mapping[str, float]
+    overrides: Tuple[Mapping, ...]
+    # Precomputed indexes
+    names: Tuple[str, ...] = field(repr=False)
+    markups: np.ndarray = field(repr=False)
+    fixed_fees: np.ndarray = field(repr=False)
+    override_index: OverrideIndex = field(repr=False)
+    brand_matcher: BrandMatcher = field(repr=False)
+
+    def apply_overrides(self, brand: str, from_currency: str, to_currency: str, amount: float,
+                        markup: float, fixed_fee: float) -> Tuple[float, float]:
+        try:
+            return self.override_index.apply(brand, from_currency, to_currency, amount, markup, fixed_fee)
+        except Exception:
+            return markup, fixed_fee
+
+    def price(self, from_currency: str, to_currency: str, amount: float, market_rate: float,
+              brands: Optional[set] = None, overrides: bool = True) -> PricingResult:
+        """
+        Price competitors (all, or only `brands`) with the shared vectorized kernel
+        Brands keep config order; per-corridor/amount overrides are applied when enabled.
+        """
+        if brands is None:
+            indices = list(range(len(self.names)))
+        else:
+            indices = [i for i, name in enumerate(self.names) if name in brands]
+        names = [self.names[i] for i in indices]
+        markups = self.markups[indices]
+        fixed_fees = self.fixed_fees[indices]
+
+        if overrides and len(self.override_index):
+            for k, name in enumerate(names):
+                markups[k], fixed_fees[k] = self.apply_overrides(
+                    name, from_currency, to_currency, amount, markups[k], fixed_fees[k]
+                )
+
+        return price_channels(names, markups, fixed_fees, amount, market_rate)
+
+
+def build_snapshot(cfg: Optional[Dict], version: int, mtime: Optional[float] = None) -> PricingSnapshot:
+    """Build a snapshot from a parsed competitors.json (None means built-in defaults)"""
+    comp = {}
+    aliases = {}
+    names = []
+    distance_policy = dict(DEFAULT_DISTANCE_POLICY)
+    overrides = []
+    if cfg is not None:
+        for item in cfg.get('brands', []):
+            brand = item.get('brand')
+            if not brand:
+                continue
+            comp[brand] = {
+                'markup': float(item.get('markup', 0.0)),
+                'fixed_fee': float(item.get('fixed_fee', 0.0)),
+                'brand': brand,
+            }
+            names.append(brand)
+            for al in item.get('aliases', []):
+                aliases[str(al).lower()] = brand
+        dp = cfg.get('distance_policy') or {}
+        distance_policy = {
+            'loss_weight': float(dp.get('loss_weight', distance_policy['loss_weight'])),
+            'distance_weight': float(dp.get('distance_weight', distance_policy['distance_weight'])),
+            'distance_cap_km': float(dp.get('distance_cap_km', distance_policy['distance_cap_km'])),
+        }
+        overrides = cfg.get('overrides', []) or []
+    else:
+        aliases = _fallback_aliases()
+
+    competitors = comp or _fallback_competitors()
+    brand_names = names or list(competitors.keys())
+    brand_name_map = {n.lower(): n for n in brand_names}
+
+    return PricingSnapshot(
+        version=version,
+        source='config' if cfg is not None else 'fallback',
+        loaded_at=datetime.utcnow(),
+        mtime=mtime,
+        competitors=MappingProxyType({k: MappingProxyType(v) for k, v in competitors.items()}),
+        brand_aliases=MappingProxyType(aliases),
+        brand_names=tuple(brand_names),
+        brand_name_map=MappingProxyType(brand_name_map),
+        distance_policy=MappingProxyType(distance_policy),
+        overrides=tuple(MappingProxyType(dict(rule)) for rule in overrides),
+        names=tuple(data['brand'] for data in competitors.values()),
+        markups=_readonly([data['markup'] for data in competitors.values()]),
+        fixed_fees=_readonly([data['fixed_fee'] for data in competitors.values()]),
+        override_index=OverrideIndex(overrides),
+        brand_matcher=BrandMatcher(brand_name_map, aliases),
+    )
+
+
+class CompetitorConfigStore:
+    """
+    Holds the current PricingSnapshot behind a single reference
+
+    Reloads build a complete new snapshot (indexes included) and then swap
+    the reference, which is atomic for readers. A background watcher reloads
+    when the file's mtime changes; reload() can also be called directly.
+    A failed reload keeps the previous snapshot.
+    """
+
+    def __init__(self, path: Path = COMPETITORS_CONFIG_PATH,
+                 interval_seconds: float = COMPETITORS_WATCH_INTERVAL_SECONDS):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._reload_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+        # mtime of a file version that failed to load, so the watcher doesn't retry it
+        self._failed_mtime: Optional[float] = None
+
+        try:
+            self._snapshot = self._load(version=1)
+        except Exception as e:
+            # Fallback to built-in defaults
+            self.last_error = str(e)
+            self._snapshot = build_snapshot(None, version=1)
+
+    @property
+    def current(self) -> PricingSnapshot:
+        return self._snapshot
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _load(self, version: int) -> PricingSnapshot:
+        mtime = self._mtime()
+        with self.path.open('r', encoding='utf-8') as f:
+            cfg = json.load(f)
+        return build_snapshot(cfg, version=version, mtime=mtime)
+
+    def reload(self) -> PricingSnapshot:
+        """Rebuild the snapshot from disk and swap it in (blocking; run off the event loop)"""
+        with self._reload_lock:
+            try:
+                snapshot = self._load(version=self._snapshot.version + 1)
+            except Exception as e:
+                self.last_error = str(e)
+                self._failed_mtime = self._mtime()
+                print(f"Competitor config reload failed: {e}")
+                return self._snapshot
+            self.last_error = None
+            self._failed_mtime = None
+            self._snapshot = snapshot
+            return snapshot
+
+    def reload_if_changed(self) -> bool:
+        """Reload only if the file's mtime differs from the current snapshot's"""
+        mtime = self._mtime()
+        if mtime is None or mtime in (self._snapshot.mtime, self._failed_mtime):
+            return False
+        before = self._snapshot.version
+        return self.reload().version != before
+
+    def start_watching(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                print(f"Competitor config watch error: {e}")
+
+
+# Global store; request handlers read competitor_store.current
+competitor_store = CompetitorConfigStore()
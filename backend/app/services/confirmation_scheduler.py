@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from decouple import config
+
+from app.services.events import EventBus, blockchain_events
+
+CONFIRMATION_BATCH_SIZE = config("CONFIRMATION_BATCH_SIZE", cast=int, default=500)
+
+# Receives the hashes that came due and the confirmation time to record;
+# returns the ones it actually confirmed
+ConfirmFn = Callable[[List[str], datetime], Awaitable[List[str]]]
+
+
+class ConfirmationScheduler:
+    """
+    Single-task scheduler for simulated blockchain confirmations
+
+    Pending hashes sit in a min-heap keyed by due time (epoch seconds), so
+    memory is one tuple per pending transaction and there is exactly one
+    sleeping task however many are pending. The worker sleeps until the
+    earliest due time (or until an earlier one is scheduled), pops everything
+    due in batches of up to batch_size, confirms each batch with one call
+    and publishes a "confirmed" event per hash on the event bus.
+    """
+
+    def __init__(self, confirm: ConfirmFn, batch_size: int = CONFIRMATION_BATCH_SIZE,
+                 events: EventBus = blockchain_events):
+        self.confirm = confirm
+        self.batch_size = max(1, batch_size)
+        self.events = events
+        self._heap: List[Tuple[float, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'scheduled': 0, 'confirmed': 0, 'batches': 0, 'failed_batches': 0}
+        self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the worker; unconfirmed hashes stay pending in the store"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._heap.clear()
+
+    def schedule(self, tx_hash: str, due_at: float):
+        """Confirm tx_hash at epoch time due_at (starts the worker on first use)"""
+        self.start()
+        wake = not self._heap or due_at < self._heap[0][0]
+        heapq.heappush(self._heap, (due_at, tx_hash))
+        self.stats['scheduled'] += 1
+        if wake:
+            self._wakeup.set()
+
+    def _pop_due(self, now: float) -> List[str]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+            due_at, tx_hash = heapq.heappop(self._heap)
+            self.max_lag_ms = max(self.max_lag_ms, (now - due_at) * 1000)
+            batch.append(tx_hash)
+        return batch
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._pop_due(time.time())
+            # One timestamp for the stored rows and the published events
+            confirmed_at = datetime.utcnow()
+            try:
+                confirmed = await self.confirm(batch, confirmed_at)
+            except Exception as e:
+                # Put the batch back and retry after a short pause
+                self.stats['failed_batches'] += 1
+                print(f"Blockchain confirmation Error: {e}")
+                retry_at = time.time() + 1.0
+                for tx_hash in batch:
+                    heapq.heappush(self._heap, (retry_at, tx_hash))
+                await asyncio.sleep(1.0)
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['confirmed'] += len(confirmed)
+            for tx_hash in confirmed:
+                self.events.publish(tx_hash, {
+                    'event': 'confirmed',
+                    'transaction_hash': tx_hash,
+                    'status': 'confirmed',
+                    'confirmed_at': confirmed_at.isoformat(),
+                })
+            # Let other coroutines run between batches of a large backlog
+            await asyncio.sleep(0)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'running': self.running,
+            'pending': len(self._heap),
+            'next_due_in_seconds': round(self._heap[0][0] - time.time(), 3) if self._heap else None,
+            'batch_size': self.batch_size,
+            'max_lag_ms': round(self.max_lag_ms, 2),
+        }
@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from decouple import config
+
+EVENT_SUBSCRIBER_BUFFER = config("EVENT_SUBSCRIBER_BUFFER", cast=int, default=32)
+
+
+class Subscription:
+    """
+    One reader's bounded event buffer, attachable to any number of topics
+
+    put() never blocks: when the buffer is full the oldest event is dropped
+    and counted in dropped, so a slow reader costs at most buffer_size
+    events of memory however busy its topics are.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_SUBSCRIBER_BUFFER):
+        self.buffer_size = max(1, buffer_size)
+        self._events: Deque[Dict] = deque()
+        self._ready = asyncio.Event()
+        self._attached: Set[Tuple["EventBus", Hashable]] = set()
+        self.dropped = 0
+
+    def put(self, event: Dict) -> bool:
+        """Buffer event; returns False if an older event had to be dropped for it"""
+        dropped = len(self._events) >= self.buffer_size
+        if dropped:
+            self._events.popleft()
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+        return not dropped
+
+    def get_nowait(self) -> Optional[Dict]:
+        if not self._events:
+            return None
+        event = self._events.popleft()
+        if not self._events:
+            self._ready.clear()
+        return event
+
+    async def get(self) -> Dict:
+        while not self._events:
+            await self._ready.wait()
+        return self.get_nowait()
+
+    def qsize(self) -> int:
+        return len(self._events)
+
+    @property
+    def topics(self) -> List[Hashable]:
+        return [topic for _, topic in self._attached]
+
+    def close(self):
+        """Detach from every topic on every bus"""
+        for bus, topic in list(self._attached):
+            bus.unsubscribe(topic, self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe keyed by topic (e.g. a transaction id)
+
+    Each subscriber is a Subscription with its own bounded buffer. publish()
+    never blocks: when a subscriber's buffer is full its oldest event is
+    dropped, so one slow reader can't hold up the publisher or other readers.
+    A Subscription can listen on many topics, across buses, with one buffer.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_SUBSCRIBER_BUFFER):
+        self.buffer_size = max(1, buffer_size)
+        self._subscribers: Dict[Hashable, Set[Subscription]] = {}
+        self.stats = {'published': 0, 'delivered': 0, 'dropped': 0}
+
+    def subscribe(self, topic: Hashable, subscription: Optional[Subscription] = None) -> Subscription:
+        """Attach subscription (a new one with this bus's buffer size by default) to topic"""
+        subscription = subscription or Subscription(self.buffer_size)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        subscription._attached.add((self, topic))
+        return subscription
+
+    def unsubscribe(self, topic: Hashable, subscription: Subscription):
+        subscription._attached.discard((self, topic))
+        subscriptions = self._subscribers.get(topic)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscribers[topic]
+
+    def publish(self, topic: Hashable, event: Dict) -> int:
+        """Deliver event to every subscriber of topic; returns how many got it"""
+        self.stats['published'] += 1
+        subscriptions = self._subscribers.get(topic, ())
+        for subscription in subscriptions:
+            if not subscription.put(event):
+                self.stats['dropped'] += 1
+            self.stats['delivered'] += 1
+        return len(subscriptions)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'topics': len(self._subscribers),
+            'subscribers': len({s for subs in self._subscribers.values() for s in subs}),
+            'buffer_size': self.buffer_size,
+        }
+
+
+# Transaction status changes, keyed by transaction id
+transaction_events = EventBus()
+
+# Blockchain confirmations, keyed by transaction hash
+blockchain_events = EventBus()
@@ -1,33 +1,25 @@
-import httpx
 import asyncio
 from typing import Dict
 
+from app.services.rate_cache import rate_cache
+from app.services.rate_matrix import rate_matrix
+
 class ExchangeRateService:
     def __init__(self):
-        self.base_url = "https://api.exchangerate-api.com/v4/latest"
-        # Fallback rates for demo
-        self.fallback_rates = {
-            'USD': {'PHP': 56.50, 'MXN': 17.25, 'INR': 83.15, 'NGN': 790.00},
-            'EUR': {'PHP': 61.20, 'USD': 1.08, 'INR': 89.80},
-            'GBP': {'PHP': 71.30, 'USD': 1.26, 'INR': 104.50}
-        }
+        # Shared with the rates router so both services hit the same tables
+        self.rate_cache = rate_cache
+        # Cross rates for every supported corridor, including fallbacks
+        self.rate_matrix = rate_matrix
         
     async def get_rate(self, from_currency: str, to_currency: str) -> Dict:
         """Get exchange rate with markup"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/{from_currency}")
-                data = response.json()
-                
-                if to_currency in data['rates']:
-                    market_rate = data['rates'][to_currency]
-                else:
-                    # Use fallback
-                    market_rate = self.fallback_rates.get(from_currency, {}).get(to_currency, 1.0)
-        
-        except Exception:
+        await self.rate_cache.get_table(self.rate_matrix.canonical_base)
+        market_rate = self.rate_matrix.cross_rate(from_currency, to_currency)
+        if market_rate is None:
+            market_rate = await self.rate_cache.get_rate(from_currency, to_currency)
+        if market_rate is None:
             # Use fallback rates
-            market_rate = self.fallback_rates.get(from_currency, {}).get(to_currency, 1.0)
+            market_rate = 1.0
         
         # Add 1.5% markup (our profit margin)
         our_rate = market_rate * 0.985
@@ -0,0 +1,197 @@
+"""
+Backtest a candidate fraud rule set against the full transactions table
+
+Rebuilds each transaction's features as of the moment it was sent (24h
+count and 7d average over that sender's earlier transactions, each
+velocity rule's window, and whether the recipient was new), then scores the whole ledger twice with
+assess_many: once with the live (active) rule set, once with the
+candidate. Reports decision counts, flag counts and how many
+decisions would change. Velocity windows are exact here, while live
+scoring uses bucketed counters that can include up to one extra bucket.
+
+Usage (from backend/):
+    python -m app.services.fraud_backtest [RULES_JSON] [--set NAME] [--verify N]
+
+RULES_JSON is either a fraud_rules.json-style file ({"active": ..., "rule_sets": {...}})
+or a single rule set object. --set picks the candidate by name from that file
+(default: its "active" set); without RULES_JSON it picks from the loaded rules,
+defaulting to the running experiment's rule set, else the active one.
+--verify re-scores N rows with assess() and checks they agree with the
+vectorized result.
+"""
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.models.database import SessionLocal
+from app.models.transaction import Transaction
+from app.services.fraud_detection import TxSummary, fraud_detector
+from app.services.fraud_rules import DECISIONS, RuleSet, compile_rule_sets, fraud_rules
+
+DAY_US = 86_400 * 1_000_000
+
+
+@dataclass
+class Ledger:
+    """Columnar transactions table sorted by (sender, created_at, id), with as-of features"""
+    ids: np.ndarray
+    amounts: np.ndarray
+    from_currencies: np.ndarray
+    to_currencies: np.ndarray
+    hours: np.ndarray
+    is_new_recipient: np.ndarray
+    count_24h: np.ndarray
+    avg_7d: np.ndarray
+    # Window seconds -> (earlier-transaction counts, sums) over that window
+    velocity: Dict[int, Tuple[np.ndarray, np.ndarray]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def columns(self) -> Dict:
+        n = len(self)
+        return dict(
+            amounts=self.amounts, from_currencies=self.from_currencies, to_currencies=self.to_currencies,
+            is_new_recipient=self.is_new_recipient,
+            # Not stored on transactions; assumed clean
+            ip_country_mismatch=np.zeros(n, dtype=bool), device_change=np.zeros(n, dtype=bool),
+            user_local_hours=self.hours, count_24h=self.count_24h, avg_7d=self.avg_7d,
+            velocity=self.velocity,
+        )
+
+
+def load_ledger(session, windows: Iterable[int] = ()) -> Ledger:
+    rows = session.execute(
+        select(Transaction.id, Transaction.sender_id, Transaction.created_at, Transaction.amount,
+               Transaction.source_currency, Transaction.target_currency, Transaction.recipient_email)
+        .where(Transaction.created_at.is_not(None))
+        .order_by(Transaction.sender_id, Transaction.created_at, Transaction.id)
+    ).all()
+    n = len(rows)
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    senders = np.fromiter((r[1] or 0 for r in rows), dtype=np.int64, count=n)
+    # Microseconds since epoch: exact, so window edges match summarize_history's >= comparisons
+    times = np.array([r[2] for r in rows], dtype='datetime64[us]').astype(np.int64)
+    amounts = np.fromiter((float(r[3] or 0) for r in rows), dtype=np.float64, count=n)
+    from_currencies = np.array([r[4] or "" for r in rows], dtype=str)
+    to_currencies = np.array([r[5] or "" for r in rows], dtype=str)
+    hours = (times // (3600 * 1_000_000)) % 24
+
+    # New recipient: first occurrence of (sender, recipient) in time order
+    pair_keys = np.array([f"{r[1]}|{(r[6] or '').strip().lower()}" for r in rows], dtype=str)
+    is_new = np.zeros(n, dtype=bool)
+    if n:
+        _, first = np.unique(pair_keys, return_index=True)
+        is_new[first] = True
+
+    # As-of windows over each sender's earlier rows via prefix sums
+    count_24h = np.zeros(n, dtype=np.int64)
+    avg_7d = np.zeros(n, dtype=np.float64)
+    velocity = {w: (np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.float64)) for w in windows}
+    bounds = np.flatnonzero(np.diff(senders)) + 1
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, n]):
+        t = times[start:stop]
+        position = np.arange(stop - start)
+        lo24 = np.searchsorted(t, t - DAY_US, side='left')
+        lo7 = np.searchsorted(t, t - 7 * DAY_US, side='left')
+        cumulative = np.r_[0.0, np.cumsum(amounts[start:stop])]
+        n7 = position - lo7
+        count_24h[start:stop] = position - lo24
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_7d[start:stop] = np.where(n7 > 0, (cumulative[position] - cumulative[lo7]) / n7, 0.0)
+        for window, (counts, sums) in velocity.items():
+            lo = np.searchsorted(t, t - window * 1_000_000, side='left')
+            counts[start:stop] = position - lo
+            sums[start:stop] = cumulative[position] - cumulative[lo]
+
+    return Ledger(ids=ids, amounts=amounts, from_currencies=from_currencies, to_currencies=to_currencies,
+                  hours=hours, is_new_recipient=is_new, count_24h=count_24h, avg_7d=avg_7d,
+                  velocity=velocity)
+
+
+def verify_rows(ledger: Ledger, batch, rule_set: RuleSet, sample: int) -> int:
+    """Re-score up to `sample` rows with assess(); returns mismatch count"""
+
+    class ExactWindows:
+        # Serves assess() the row's precomputed velocity columns
+        def __init__(self, i):
+            self.i = i
+
+        def count_sum(self, window_seconds, now):
+            counts, sums = ledger.velocity[window_seconds]
+            return int(counts[self.i]), float(sums[self.i])
+
+    if not len(ledger) or sample <= 0:
+        return 0
+    mismatches = 0
+    for i in np.linspace(0, len(ledger) - 1, min(sample, len(ledger))).astype(int):
+        expected = fraud_detector.assess(
+            amount=float(ledger.amounts[i]), from_currency=str(ledger.from_currencies[i]),
+            to_currency=str(ledger.to_currencies[i]), is_new_recipient=bool(ledger.is_new_recipient[i]),
+            ip_country_mismatch=False, device_change=False, user_local_hour=int(ledger.hours[i]),
+            features=TxSummary(count_24h=int(ledger.count_24h[i]), avg_7d=float(ledger.avg_7d[i])),
+            velocity=ExactWindows(int(i)), rule_set=rule_set,
+        )
+        mismatches += expected != batch.to_dict(int(i))
+    return mismatches
+
+
+def load_candidate(path: Optional[str], name: Optional[str]) -> RuleSet:
+    if path is None:
+        stats = fraud_rules.get_stats()
+        return fraud_rules.get(name or stats['experiment']['rule_set'] or stats['active'])
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    if "rule_sets" not in cfg:
+        cfg = {"rule_sets": {name or "candidate": cfg}}
+    return compile_rule_sets(cfg)[name or cfg.get("active") or next(iter(cfg["rule_sets"]))]
+
+
+def backtest(session, candidate: RuleSet, verify: int = 0):
+    baseline_set = fraud_rules.active
+    started = time.perf_counter()
+    ledger = load_ledger(session, set(baseline_set.velocity_windows) | set(candidate.velocity_windows))
+    loaded = time.perf_counter()
+
+    baseline = fraud_detector.assess_many(**ledger.columns(), rule_set=baseline_set)
+    proposed = fraud_detector.assess_many(**ledger.columns(), rule_set=candidate)
+    scored = time.perf_counter()
+
+    print(f"transactions: {len(ledger)}  (load+features {loaded - started:.2f}s, scoring {scored - loaded:.3f}s)")
+    print(f"{'':12s}{baseline_set.name:>10s}{candidate.name:>11s}")
+    base_counts, new_counts = baseline.decision_counts(), proposed.decision_counts()
+    for name in DECISIONS:
+        print(f"{name:12s}{base_counts[name]:10d}{new_counts[name]:11d}")
+    print("flags (baseline / candidate):")
+    base_flags, new_flags = baseline.flag_counts(), proposed.flag_counts()
+    for name in dict.fromkeys([*base_flags, *new_flags]):
+        print(f"  {name:22s}{base_flags.get(name, 0):8d}{new_flags.get(name, 0):8d}")
+
+    changed = baseline.decisions != proposed.decisions
+    print(f"decisions changed: {int(changed.sum())}")
+    transitions = np.bincount(baseline.decisions * len(DECISIONS) + proposed.decisions,
+                              minlength=len(DECISIONS) ** 2).reshape(len(DECISIONS), len(DECISIONS))
+    for b, c in zip(*np.nonzero(transitions)):
+        if b != c:
+            print(f"  {DECISIONS[b]} -> {DECISIONS[c]}: {int(transitions[b, c])}")
+
+    if verify:
+        mismatches = verify_rows(ledger, baseline, baseline_set, verify)
+        mismatches += verify_rows(ledger, proposed, candidate, verify)
+        print(f"verify: {mismatches} mismatches vs assess() on {min(verify, len(ledger))} rows per rule set")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a fraud rule set against the transactions table")
+    parser.add_argument("rules", nargs="?", help="fraud_rules.json-style file, or a single rule set object")
+    parser.add_argument("--set", dest="rule_set", help="rule set name to use as the candidate")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="check N rows against assess()")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        backtest(session, load_candidate(args.rules, args.rule_set), verify=args.verify)
@@ -1,22 +1,17 @@
 # app/services/fraud_detection.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
 from datetime import datetime, timedelta
 
-# simple risk weights you can tweak
-AMOUNT_HI = 1500.0
-WEIGHTS = {
-    "amount": 30,
-    "velocity": 25,
-    "new_recipient": 15,
-    "ip_mismatch": 10,
-    "device_change": 10,
-    "nighttime": 10,
-    "corridor": 10,
-}
+import numpy as np
 
-RISKY_CORRIDORS = {("USD", "NGN"), ("USD", "INR")}  # example tweak freely
+from app.services.fraud_rules import DECISIONS, FraudRuleStore, RuleContext, RuleSet, fraud_rules
+
+# Rules, weights, thresholds and risky corridors live in app/config/fraud_rules.json
+
+class WindowCounter(Protocol):
+    def count_sum(self, window_seconds: float, now: datetime) -> Tuple[int, float]: ...
 
 @dataclass
 class TxSummary:
@@ -52,6 +47,9 @@ def summarize_history(history: List[Dict], now: Optional[datetime] = None) -> Tx
     return TxSummary(count_24h=cnt24, avg_7d=(sum7 / n7 if n7 else 0.0))
 
 class FraudDetector:
+    def __init__(self, rules: FraudRuleStore = fraud_rules):
+        self.rules = rules
+
     def assess(
         self,
         *,
@@ -61,48 +59,112 @@ class FraudDetector:
         is_new_recipient: bool,
         ip_country_mismatch: bool,
         device_change: bool,
-        user_local_hour: int,
+        user_local_hour: Optional[int],
         history: Optional[List[Dict]] = None,
+        features: Optional[TxSummary] = None,
+        velocity: Optional[WindowCounter] = None,
+        now: Optional[datetime] = None,
+        sender_id: Optional[int] = None,
+        rule_set: Optional[RuleSet] = None,
+        complete: bool = True,
     ) -> Dict:
-        hist = summarize_history(history or [])
-        score = 0
-        flags = []
+        """
+        Score one transaction with the sender's rule set (A/B split by sender_id)
+        complete=False lets the rule set stop once the decision is settled; flags may then be partial.
+        """
+        # Precomputed features (fraud_features store) skip the history scan
+        hist = features if features is not None else summarize_history(history or [])
+        rule_set = rule_set or self.rules.select(sender_id)
+        ctx = RuleContext(
+            amount=amount, from_currency=from_currency, to_currency=to_currency,
+            is_new_recipient=is_new_recipient, ip_country_mismatch=ip_country_mismatch,
+            device_change=device_change, user_local_hour=user_local_hour,
+            count_24h=hist.count_24h, avg_7d=hist.avg_7d, velocity=velocity, now=now,
+        )
+        score, decision, flags = rule_set.evaluate(ctx, complete=complete)
 
-        if amount >= AMOUNT_HI or amount > hist.avg_7d * 2.5 and hist.avg_7d > 0:
-            score += WEIGHTS["amount"]; flags.append("high_amount")
+        return {
+            "score": score,
+            "decision": decision,
+            "flags": flags,
+            "history": {"count_24h": hist.count_24h, "avg_7d": round(hist.avg_7d, 2)},
+            "rule_set": rule_set.name,
+        }
 
-        if hist.count_24h >= 3:
-            score += WEIGHTS["velocity"]; flags.append("high_velocity_24h")
+    def assess_many(
+        self,
+        *,
+        amounts: Sequence[float],
+        from_currencies: Sequence[str],
+        to_currencies: Sequence[str],
+        is_new_recipient: Sequence[bool],
+        ip_country_mismatch: Sequence[bool],
+        device_change: Sequence[bool],
+        user_local_hours: Sequence[int],
+        count_24h: Sequence[int],
+        avg_7d: Sequence[float],
+        velocity: Optional[Dict[int, Tuple[Sequence[int], Sequence[float]]]] = None,
+        rule_set: Optional[RuleSet] = None,
+    ) -> "AssessmentBatch":
+        """
+        Score N transactions in one vectorized pass (columnar inputs, one entry per transaction)
+        velocity maps a window in seconds to (counts, sums) of earlier transactions in it; velocity
+        rules without a column don't fire. Every row matches assess() with the same rule set.
+        """
+        rule_set = rule_set or self.rules.active
+        cols = {
+            "amounts": np.asarray(amounts, dtype=np.float64),
+            "from_currencies": from_currencies,
+            "to_currencies": to_currencies,
+            "is_new_recipient": np.asarray(is_new_recipient, dtype=bool),
+            "ip_country_mismatch": np.asarray(ip_country_mismatch, dtype=bool),
+            "device_change": np.asarray(device_change, dtype=bool),
+            "user_local_hours": np.asarray(user_local_hours),
+            "count_24h": np.asarray(count_24h),
+            "avg_7d": np.asarray(avg_7d, dtype=np.float64),
+            "velocity": velocity,
+        }
+        scores, decisions, flags = rule_set.evaluate_many(cols)
+        return AssessmentBatch(scores=scores, decisions=decisions, flags=flags, flag_names=rule_set.flag_names,
+                               rule_set=rule_set.name, count_24h=cols["count_24h"], avg_7d=cols["avg_7d"])
 
-        if is_new_recipient:
-            score += WEIGHTS["new_recipient"]; flags.append("new_recipient")
 
-        if ip_country_mismatch:
-            score += WEIGHTS["ip_mismatch"]; flags.append("ip_country_mismatch")
+@dataclass
+class AssessmentBatch:
+    """
+    Column-oriented assess_many() output
 
-        if device_change:
-            score += WEIGHTS["device_change"]; flags.append("new_device")
+    scores (N,), decisions (N,) as indices into DECISIONS, flags (N, F) in flag_names order.
+    """
+    scores: np.ndarray
+    decisions: np.ndarray
+    flags: np.ndarray
+    flag_names: List[str]
+    rule_set: str
+    count_24h: np.ndarray
+    avg_7d: np.ndarray
 
-        if user_local_hour < 6 or user_local_hour >= 23:
-            score += WEIGHTS["nighttime"]; flags.append("nighttime_activity")
+    def __len__(self):
+        return len(self.scores)
 
-        if (from_currency, to_currency) in RISKY_CORRIDORS:
-            score += WEIGHTS["corridor"]; flags.append("risky_corridor")
+    def decision_names(self) -> np.ndarray:
+        return DECISIONS[self.decisions]
 
-        # clamp 0..100
-        score = max(0, min(100, score))
+    def decision_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.decisions, minlength=len(DECISIONS))
+        return {str(name): int(n) for name, n in zip(DECISIONS, counts)}
 
-        decision = "allow"
-        if score >= 70:
-            decision = "block"
-        elif score >= 40:
-            decision = "review"
+    def flag_counts(self) -> Dict[str, int]:
+        return {name: int(n) for name, n in zip(self.flag_names, self.flags.sum(axis=0))}
 
+    def to_dict(self, i: int) -> Dict:
+        """Row i in the same shape assess() returns"""
         return {
-            "score": score,
-            "decision": decision,
-            "flags": flags,
-            "history": {"count_24h": hist.count_24h, "avg_7d": round(hist.avg_7d, 2)},
+            "score": int(self.scores[i]),
+            "decision": str(DECISIONS[self.decisions[i]]),
+            "flags": [name for name, hit in zip(self.flag_names, self.flags[i]) if hit],
+            "history": {"count_24h": int(self.count_24h[i]), "avg_7d": round(float(self.avg_7d[i]), 2)},
+            "rule_set": self.rule_set,
         }
 
 fraud_detector = FraudDetector()
@@ -0,0 +1,253 @@
+import asyncio
+import bisect
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from decouple import config
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+from app.services.fraud_detection import TxSummary, summarize_history
+from app.services.velocity import VelocityCounter
+
+FRAUD_FEATURES_MAX_SENDERS = config("FRAUD_FEATURES_MAX_SENDERS", cast=int, default=20000)
+# A sender is re-hydrated from the table once its features are this old (0 = never)
+FRAUD_FEATURES_MAX_AGE_SECONDS = config("FRAUD_FEATURES_MAX_AGE_SECONDS", cast=float, default=60.0)
+
+WINDOW_24H = timedelta(hours=24)
+WINDOW_7D = timedelta(days=7)
+
+
+def recipient_key(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+
+class SenderFeatures:
+    """
+    Rolling aggregates for one sender
+
+    Events inside the 7-day window are kept in time order with a running
+    7d sum and a cursor to the first event inside 24h. Expired events are
+    dropped from the front on each read, so updates and reads are amortized O(1).
+    velocity holds bucketed counters for the detector's arbitrary-window rules.
+    loaded_at is the monotonic time the features were hydrated from the table.
+    """
+
+    __slots__ = ('events', 'head_24h', 'sum_7d', 'recipients', 'velocity', 'loaded_at')
+
+    def __init__(self):
+        self.events: Deque[Tuple[datetime, float]] = deque()
+        # Index into events of the oldest event still inside 24h
+        self.head_24h = 0
+        self.sum_7d = 0.0
+        self.recipients: Set[str] = set()
+        self.velocity = VelocityCounter()
+        self.loaded_at = time.monotonic()
+
+    @property
+    def count_24h(self) -> int:
+        return len(self.events) - self.head_24h
+
+    def add(self, created_at: datetime, amount: float, recipient: str, now: datetime):
+        self.recipients.add(recipient)
+        if created_at < now - WINDOW_7D:
+            return
+        self.velocity.add(created_at, amount)
+        event = (created_at, amount)
+        if self.events and created_at < self.events[-1][0]:
+            # Late arrival: keep time order and recompute (rare)
+            bisect.insort(self.events, event)
+            self._recount(now)
+            return
+        self.events.append(event)
+        self.sum_7d += amount
+
+    def advance(self, now: datetime):
+        """Drop events that fell out of the windows as of now"""
+        t7d = now - WINDOW_7D
+        while self.events and self.events[0][0] < t7d:
+            _, amount = self.events.popleft()
+            self.sum_7d -= amount
+            if self.head_24h > 0:
+                self.head_24h -= 1
+        t24 = now - WINDOW_24H
+        while self.head_24h < len(self.events) and self.events[self.head_24h][0] < t24:
+            self.head_24h += 1
+
+    def _recount(self, now: datetime):
+        self.sum_7d = sum(amount for _, amount in self.events)
+        self.head_24h = bisect.bisect_left(self.events, (now - WINDOW_24H,))
+
+    def summary(self, now: datetime) -> TxSummary:
+        self.advance(now)
+        n7 = len(self.events)
+        # Rebase the float sum when the window empties so rounding error can't accumulate
+        if n7 == 0:
+            self.sum_7d = 0.0
+        return TxSummary(count_24h=self.count_24h, avg_7d=(self.sum_7d / n7 if n7 else 0.0))
+
+
+class FraudFeatureStore:
+    """
+    Per-sender fraud features maintained on insert instead of re-scanned per send
+
+    A sender's features are hydrated from the transactions table on first
+    use (7 days of amounts plus every recipient ever paid), then updated by
+    record() after each insert in this process. Senders are held in LRU order
+    and evicted past max_senders; an evicted sender is simply re-hydrated.
+
+    record() only sees this process's inserts, so with several workers a
+    loaded sender drifts from the table (under-counted velocity, recipients
+    paid from another worker still look new). Entries older than
+    max_age_seconds are therefore re-hydrated on the next read, which bounds
+    that drift; max_age_seconds=0 disables the refresh and is only correct
+    with a single worker.
+    """
+
+    def __init__(self, max_senders: int = FRAUD_FEATURES_MAX_SENDERS,
+                 max_age_seconds: float = FRAUD_FEATURES_MAX_AGE_SECONDS):
+        self.max_senders = max(1, max_senders)
+        self.max_age_seconds = max_age_seconds
+        self._senders: "OrderedDict[int, SenderFeatures]" = OrderedDict()
+        self._hydrating: Dict[int, asyncio.Lock] = {}
+        self.stats = {'hits': 0, 'hydrations': 0, 'refreshes': 0, 'records': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._senders)
+
+    async def get(self, db: AsyncSession, sender_id: int) -> SenderFeatures:
+        """Features for a sender, hydrating from the database on a miss"""
+        features = self._senders.get(sender_id)
+        if features is not None and self._fresh(features):
+            self.stats['hits'] += 1
+            self._senders.move_to_end(sender_id)
+            return features
+
+        lock = self._hydrating.setdefault(sender_id, asyncio.Lock())
+        async with lock:
+            features = self._senders.get(sender_id)
+            if features is None or not self._fresh(features):
+                if features is not None:
+                    self.stats['refreshes'] += 1
+                features = await self._hydrate(db, sender_id)
+                self._put(sender_id, features)
+        if not lock.locked():
+            self._hydrating.pop(sender_id, None)
+        return features
+
+    def _fresh(self, features: SenderFeatures) -> bool:
+        return self.max_age_seconds <= 0 or time.monotonic() - features.loaded_at < self.max_age_seconds
+
+    async def summary(self, db: AsyncSession, sender_id: int, now: Optional[datetime] = None) -> TxSummary:
+        features = await self.get(db, sender_id)
+        return features.summary(now or datetime.utcnow())
+
+    async def is_new_recipient(self, db: AsyncSession, sender_id: int, recipient_email: str) -> bool:
+        features = await self.get(db, sender_id)
+        return recipient_key(recipient_email) not in features.recipients
+
+    def record(self, transaction: Transaction, now: Optional[datetime] = None):
+        """Fold a committed transaction into its sender's features (no-op if not loaded)"""
+        features = self._senders.get(transaction.sender_id)
+        if features is None:
+            return
+        self.stats['records'] += 1
+        features.add(transaction.created_at or datetime.utcnow(), float(transaction.amount or 0),
+                     recipient_key(transaction.recipient_email), now or datetime.utcnow())
+
+    def invalidate(self, sender_id: Optional[int] = None):
+        if sender_id is None:
+            self._senders.clear()
+        else:
+            self._senders.pop(sender_id, None)
+
+    def _put(self, sender_id: int, features: SenderFeatures):
+        self._senders[sender_id] = features
+        self._senders.move_to_end(sender_id)
+        while len(self._senders) > self.max_senders:
+            self._senders.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    async def _hydrate(self, db: AsyncSession, sender_id: int) -> SenderFeatures:
+        self.stats['hydrations'] += 1
+        now = datetime.utcnow()
+        rows = (await db.execute(
+            select(Transaction.created_at, Transaction.amount)
+            .where(Transaction.sender_id == sender_id, Transaction.created_at >= now - WINDOW_7D)
+            .order_by(Transaction.created_at, Transaction.id)
+        )).all()
+        recipients = (await db.scalars(
+            select(Transaction.recipient_email).where(Transaction.sender_id == sender_id).distinct()
+        )).all()
+        return build_features(rows, recipients, now)
+
+    def rebuild(self, session) -> int:
+        """Rebuild every sender from the transactions table (sync session; scripts/startup)"""
+        now = datetime.utcnow()
+        rows_by_sender: Dict[int, List[Tuple[datetime, float]]] = {}
+        recipients_by_sender: Dict[int, Set[str]] = {}
+        for sender_id, created_at, amount, recipient in session.execute(
+            select(Transaction.sender_id, Transaction.created_at, Transaction.amount, Transaction.recipient_email)
+            .order_by(Transaction.created_at, Transaction.id)
+        ):
+            recipients_by_sender.setdefault(sender_id, set()).add(recipient)
+            if created_at is not None and created_at >= now - WINDOW_7D:
+                rows_by_sender.setdefault(sender_id, []).append((created_at, amount))
+
+        self._senders.clear()
+        for sender_id, recipients in recipients_by_sender.items():
+            self._put(sender_id, build_features(rows_by_sender.get(sender_id, []), recipients, now))
+        return len(self._senders)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'senders': len(self._senders), 'max_senders': self.max_senders,
+                'max_age_seconds': self.max_age_seconds}
+
+
+def build_features(rows: Iterable[Tuple[datetime, float]], recipients: Iterable[Optional[str]],
+                   now: datetime) -> SenderFeatures:
+    """SenderFeatures from time-ordered (created_at, amount) rows and recipient emails"""
+    features = SenderFeatures()
+    for created_at, amount in rows:
+        features.events.append((created_at, float(amount or 0)))
+        features.velocity.add(created_at, float(amount or 0))
+    features.recipients = {recipient_key(r) for r in recipients}
+    features._recount(now)
+    return features
+
+
+def verify(session, store: "FraudFeatureStore") -> List[Dict]:
+    """Compare the store against summarize_history over a full table scan; returns mismatches"""
+    now = datetime.utcnow()
+    history: Dict[int, List[Dict]] = {}
+    for sender_id, created_at, amount in session.execute(
+        select(Transaction.sender_id, Transaction.created_at, Transaction.amount)
+    ):
+        history.setdefault(sender_id, []).append({'created_at': created_at, 'amount': amount or 0})
+
+    mismatches = []
+    for sender_id, rows in history.items():
+        expected = summarize_history(rows, now=now)
+        features = store._senders.get(sender_id)
+        actual = features.summary(now) if features is not None else TxSummary()
+        if expected.count_24h != actual.count_24h or abs(expected.avg_7d - actual.avg_7d) > 1e-6:
+            mismatches.append({'sender_id': sender_id, 'expected': expected, 'actual': actual})
+    return mismatches
+
+
+# Global store used by send_money
+fraud_features = FraudFeatureStore()
+
+
+if __name__ == "__main__":
+    from app.models.database import SessionLocal
+
+    with SessionLocal() as session:
+        senders = fraud_features.rebuild(session)
+        mismatches = verify(session, fraud_features)
+    print(f"Rebuilt features for {senders} senders; {len(mismatches)} mismatches vs table scan")
+    for m in mismatches[:20]:
+        print(m)
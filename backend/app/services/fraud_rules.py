@@ -0,0 +1,417 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.rate_matrix import MATRIX_CURRENCIES
+
+FRAUD_RULES_CONFIG_PATH = Path(__file__).resolve().parents[1] / 'config' / 'fraud_rules.json'
+
+DECISIONS = np.array(["allow", "review", "block"])
+
+# Default evaluation cost per rule type; cheaper rules run first
+RULE_COSTS = {
+    "flag": 1,
+    "hour_outside": 1,
+    "count_24h": 1,
+    "amount": 2,
+    "corridor": 2,
+    "velocity": 10,
+}
+
+
+def _fallback_rule_sets():
+    return {
+        "active": "default",
+        "rule_sets": {
+            "default": {
+                "review_threshold": 40,
+                "block_threshold": 70,
+                "risky_corridors": [["USD", "NGN"], ["USD", "INR"]],
+                "rules": [
+                    {"flag": "high_amount", "type": "amount", "weight": 30, "amount_hi": 1500.0, "avg_multiplier": 2.5},
+                    {"flag": "high_velocity_24h", "type": "count_24h", "weight": 25, "min_count": 3},
+                    {"flag": "new_recipient", "type": "flag", "field": "is_new_recipient", "weight": 15},
+                    {"flag": "ip_country_mismatch", "type": "flag", "field": "ip_country_mismatch", "weight": 10},
+                    {"flag": "new_device", "type": "flag", "field": "device_change", "weight": 10},
+                    {"flag": "nighttime_activity", "type": "hour_outside", "weight": 10, "start": 6, "end": 23},
+                    {"flag": "risky_corridor", "type": "corridor", "weight": 10},
+                    {"flag": "burst_10m", "type": "velocity", "weight": 15, "window_seconds": 600, "max_count": 3},
+                    {"flag": "high_volume_1h", "type": "velocity", "weight": 15, "window_seconds": 3600, "max_sum": 5000.0},
+                ],
+            }
+        },
+    }
+
+
+class RuleContext:
+    """Inputs for scoring one transaction"""
+
+    __slots__ = ('amount', 'from_currency', 'to_currency', 'is_new_recipient', 'ip_country_mismatch',
+                 'device_change', 'user_local_hour', 'count_24h', 'avg_7d', 'velocity', 'now')
+
+    def __init__(self, *, amount, from_currency, to_currency, is_new_recipient, ip_country_mismatch,
+                 device_change, user_local_hour, count_24h, avg_7d, velocity=None, now=None):
+        self.amount = amount
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        self.is_new_recipient = is_new_recipient
+        self.ip_country_mismatch = ip_country_mismatch
+        self.device_change = device_change
+        self.user_local_hour = user_local_hour
+        self.count_24h = count_24h
+        self.avg_7d = avg_7d
+        # Anything with count_sum(window_seconds, now) -> (count, sum), e.g. velocity.VelocityCounter
+        self.velocity = velocity
+        self.now = now
+
+
+class CurrencyIndex:
+    """Currency code -> dense index, plus per-currency corridor bitmasks"""
+
+    def __init__(self, codes: Sequence[str]):
+        self.codes = list(dict.fromkeys(codes))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    def lookup(self, codes) -> np.ndarray:
+        """Vector of indices (-1 for unknown codes)"""
+        codes = np.asarray(codes, dtype=str)
+        if not len(codes):
+            return np.zeros(0, dtype=np.int64)
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        return np.array([self.index.get(str(c), -1) for c in uniques], dtype=np.int64)[inverse]
+
+
+@dataclass
+class CompiledRule:
+    flag: str
+    rule_type: str
+    weight: int
+    cost: int
+    order: int
+    check: Callable[[RuleContext], bool]
+    vector: Callable[[Dict], np.ndarray]
+    window_seconds: Optional[int] = None
+
+
+# Rule compilers: (spec, rule set spec, currency index) -> (check, vector)
+
+def _compile_amount(spec, rs, currencies):
+    amount_hi = float(spec.get("amount_hi", 1500.0))
+    multiplier = float(spec.get("avg_multiplier", 2.5))
+
+    def check(ctx):
+        return ctx.amount >= amount_hi or ctx.amount > ctx.avg_7d * multiplier and ctx.avg_7d > 0
+
+    def vector(cols):
+        return (cols["amounts"] >= amount_hi) | ((cols["amounts"] > cols["avg_7d"] * multiplier) & (cols["avg_7d"] > 0))
+
+    return check, vector
+
+def _compile_count_24h(spec, rs, currencies):
+    min_count = int(spec.get("min_count", 3))
+    return (lambda ctx: ctx.count_24h >= min_count), (lambda cols: cols["count_24h"] >= min_count)
+
+_FLAG_FIELDS = {"is_new_recipient", "ip_country_mismatch", "device_change"}
+
+def _compile_flag(spec, rs, currencies):
+    field = spec["field"]
+    if field not in _FLAG_FIELDS:
+        raise ValueError(f"Unknown flag field: {field}")
+    return (lambda ctx: bool(getattr(ctx, field))), (lambda cols: cols[field])
+
+def _compile_hour_outside(spec, rs, currencies):
+    start, end = int(spec.get("start", 6)), int(spec.get("end", 23))
+
+    # Unknown local hour (None, or a negative hour in columns) never fires: a UTC
+    # hour would flag ordinary evening sends from timezones west of UTC
+    def vector(cols):
+        hours = cols["user_local_hours"]
+        return (hours >= 0) & ((hours < start) | (hours >= end))
+
+    def scalar(ctx):
+        hour = ctx.user_local_hour
+        return hour is not None and (hour < start or hour >= end)
+
+    return scalar, vector
+
+def _compile_corridor(spec, rs, currencies):
+    corridors = spec.get("corridors", rs.get("risky_corridors", []))
+    # masks[i] has bit j set when (codes[i], codes[j]) is risky
+    masks = [0] * len(currencies.codes)
+    bitmap = np.zeros((len(currencies.codes) + 1, len(currencies.codes) + 1), dtype=bool)
+    for src, dst in corridors:
+        i, j = currencies.index[src], currencies.index[dst]
+        masks[i] |= 1 << j
+        bitmap[i, j] = True
+    index = currencies.index
+
+    def check(ctx):
+        i = index.get(ctx.from_currency)
+        j = index.get(ctx.to_currency)
+        return i is not None and j is not None and bool(masks[i] >> j & 1)
+
+    def vector(cols):
+        # -1 (unknown) lands on the all-False last row/column
+        return bitmap[cols["from_idx"], cols["to_idx"]]
+
+    return check, vector
+
+def _compile_velocity(spec, rs, currencies):
+    window = int(spec["window_seconds"])
+    max_count = spec.get("max_count")
+    max_sum = spec.get("max_sum")
+    if max_count is None and max_sum is None:
+        raise ValueError(f"Velocity rule {spec.get('flag')} needs max_count or max_sum")
+
+    def check(ctx):
+        # Earlier transactions in the window; the sum also counts this one
+        if ctx.velocity is None:
+            return False
+        count, total = ctx.velocity.count_sum(window, ctx.now or datetime.utcnow())
+        return ((max_count is not None and count >= max_count)
+                or (max_sum is not None and total + ctx.amount >= max_sum))
+
+    def vector(cols):
+        columns = (cols.get("velocity") or {}).get(window)
+        if columns is None:
+            return np.zeros(len(cols["amounts"]), dtype=bool)
+        counts, sums = np.asarray(columns[0]), np.asarray(columns[1], dtype=np.float64)
+        hit = np.zeros(len(counts), dtype=bool)
+        if max_count is not None:
+            hit |= counts >= max_count
+        if max_sum is not None:
+            hit |= sums + cols["amounts"] >= max_sum
+        return hit
+
+    return check, vector
+
+RULE_COMPILERS = {
+    "amount": _compile_amount,
+    "count_24h": _compile_count_24h,
+    "flag": _compile_flag,
+    "hour_outside": _compile_hour_outside,
+    "corridor": _compile_corridor,
+    "velocity": _compile_velocity,
+}
+
+
+class RuleSet:
+    """
+    One declarative rule set compiled into an ordered list of checks
+
+    Rules run cheapest first. With complete=False evaluation stops as soon
+    as the remaining rules can no longer change the decision; flags are
+    always reported in declaration order. Each rule keeps evaluation/hit
+    counters and cumulative time.
+    """
+
+    def __init__(self, name: str, spec: Dict, currencies: CurrencyIndex):
+        self.name = name
+        self.review_threshold = int(spec.get("review_threshold", 40))
+        self.block_threshold = int(spec.get("block_threshold", 70))
+
+        rules = []
+        for order, rule_spec in enumerate(spec.get("rules", [])):
+            rule_type = rule_spec["type"]
+            if rule_type not in RULE_COMPILERS:
+                raise ValueError(f"Unknown rule type: {rule_type}")
+            check, vector = RULE_COMPILERS[rule_type](rule_spec, spec, currencies)
+            rules.append(CompiledRule(
+                flag=rule_spec["flag"], rule_type=rule_type, weight=int(rule_spec.get("weight", 0)),
+                cost=int(rule_spec.get("cost", RULE_COSTS[rule_type])), order=order,
+                check=check, vector=vector, window_seconds=rule_spec.get("window_seconds"),
+            ))
+        self.declared = rules
+        self.rules = sorted(rules, key=lambda r: (r.cost, r.order))
+        self.flag_names = [r.flag for r in rules]
+        self.velocity_windows = sorted({r.window_seconds for r in rules if r.rule_type == "velocity"})
+        self.currencies = currencies
+
+        # Best/worst score the rules from position k onward can still add
+        self._max_gain = [0] * (len(self.rules) + 1)
+        self._min_gain = [0] * (len(self.rules) + 1)
+        for k in range(len(self.rules) - 1, -1, -1):
+            w = self.rules[k].weight
+            self._max_gain[k] = self._max_gain[k + 1] + max(w, 0)
+            self._min_gain[k] = self._min_gain[k + 1] + min(w, 0)
+
+        self.evaluations = 0
+        self.short_circuits = 0
+        self._evaluated = [0] * len(self.rules)
+        self._hits = [0] * len(self.rules)
+        self._ns = [0] * len(self.rules)
+
+    def decide(self, score: int) -> int:
+        return int(score >= self.review_threshold) + int(score >= self.block_threshold)
+
+    def evaluate(self, ctx: RuleContext, complete: bool = True) -> Tuple[int, str, List[str]]:
+        """(score, decision, flags) for one transaction"""
+        self.evaluations += 1
+        score = 0
+        hit_orders = []
+        rules = self.rules
+        for k, rule in enumerate(rules):
+            if not complete:
+                lo = max(0, min(100, score + self._min_gain[k]))
+                hi = max(0, min(100, score + self._max_gain[k]))
+                if self.decide(lo) == self.decide(hi):
+                    self.short_circuits += 1
+                    break
+            started = time.perf_counter_ns()
+            hit = rule.check(ctx)
+            self._ns[k] += time.perf_counter_ns() - started
+            self._evaluated[k] += 1
+            if hit:
+                self._hits[k] += 1
+                score += rule.weight
+                hit_orders.append(rule.order)
+
+        score = max(0, min(100, score))
+        flags = [self.declared[i].flag for i in sorted(hit_orders)]
+        return score, str(DECISIONS[self.decide(score)]), flags
+
+    def evaluate_many(self, cols: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(scores, decision indices, flag matrix in declaration order) for columnar inputs"""
+        n = len(cols["amounts"])
+        cols = dict(cols)
+        cols["from_idx"] = self.currencies.lookup(cols["from_currencies"])
+        cols["to_idx"] = self.currencies.lookup(cols["to_currencies"])
+        flags = np.zeros((n, len(self.declared)), dtype=bool)
+        for j, rule in enumerate(self.declared):
+            flags[:, j] = rule.vector(cols)
+        weights = np.array([r.weight for r in self.declared], dtype=np.int64)
+        scores = np.clip(flags.astype(np.int64) @ weights, 0, 100)
+        decisions = (scores >= self.review_threshold).astype(np.int8) + (scores >= self.block_threshold)
+        return scores, decisions, flags
+
+    def get_stats(self) -> Dict:
+        rules = []
+        for k, rule in enumerate(self.rules):
+            evaluated = self._evaluated[k]
+            rules.append({
+                'flag': rule.flag,
+                'type': rule.rule_type,
+                'weight': rule.weight,
+                'cost': rule.cost,
+                'evaluated': evaluated,
+                'hits': self._hits[k],
+                'hit_rate': round(self._hits[k] / evaluated, 4) if evaluated else 0.0,
+                'avg_ns': round(self._ns[k] / evaluated) if evaluated else 0,
+            })
+        return {
+            'name': self.name,
+            'review_threshold': self.review_threshold,
+            'block_threshold': self.block_threshold,
+            'evaluations': self.evaluations,
+            'short_circuits': self.short_circuits,
+            'rules': rules,
+        }
+
+
+def compile_rule_sets(cfg: Dict) -> Dict[str, RuleSet]:
+    """Compile every rule set in a parsed fraud_rules.json"""
+    codes = list(MATRIX_CURRENCIES)
+    for spec in cfg.get("rule_sets", {}).values():
+        for rule in spec.get("rules", []):
+            for pair in rule.get("corridors", []):
+                codes.extend(pair)
+        for pair in spec.get("risky_corridors", []):
+            codes.extend(pair)
+    currencies = CurrencyIndex(codes)
+    return {name: RuleSet(name, spec, currencies) for name, spec in cfg.get("rule_sets", {}).items()}
+
+
+class FraudRuleStore:
+    """
+    Compiled rule sets from fraud_rules.json with an A/B split
+
+    Senders are bucketed by a stable hash of their id; the experiment's
+    percent of them get the experiment rule set, everyone else the active
+    one. reload() compiles the file and swaps the sets in one assignment; a
+    failed reload keeps the previous sets.
+    """
+
+    def __init__(self, path: Path = FRAUD_RULES_CONFIG_PATH):
+        self.path = path
+        self._reload_lock = threading.Lock()
+        self.version = 0
+        self.last_error: Optional[str] = None
+        self.source = 'fallback'
+        try:
+            self._state = self._load()
+            self.source = 'config'
+        except Exception as e:
+            # Fallback to the built-in rule set
+            self.last_error = str(e)
+            self._state = self._compile(_fallback_rule_sets())
+        self.version = 1
+
+    @staticmethod
+    def _compile(cfg: Dict) -> Tuple[Dict[str, RuleSet], str, Optional[str], int]:
+        sets = compile_rule_sets(cfg)
+        active = cfg.get("active", "default")
+        if active not in sets:
+            raise ValueError(f"Active rule set {active} is not defined")
+        experiment = cfg.get("experiment") or {}
+        candidate = experiment.get("rule_set")
+        percent = int(experiment.get("percent", 0))
+        if candidate is not None and candidate not in sets:
+            raise ValueError(f"Experiment rule set {candidate} is not defined")
+        return sets, active, candidate, max(0, min(100, percent))
+
+    def _load(self):
+        with self.path.open('r', encoding='utf-8') as f:
+            return self._compile(json.load(f))
+
+    def reload(self) -> int:
+        """Recompile fraud_rules.json and swap it in; returns the (possibly unchanged) version"""
+        with self._reload_lock:
+            try:
+                state = self._load()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Fraud rules reload failed: {e}")
+                return self.version
+            self._state = state
+            self.source = 'config'
+            self.last_error = None
+            self.version += 1
+            return self.version
+
+    @property
+    def active(self) -> RuleSet:
+        sets, active, _, _ = self._state
+        return sets[active]
+
+    def get(self, name: str) -> RuleSet:
+        return self._state[0][name]
+
+    def select(self, sender_id: Optional[int] = None) -> RuleSet:
+        """Rule set for a sender under the current A/B split"""
+        sets, active, candidate, percent = self._state
+        if candidate is None or not percent or sender_id is None:
+            return sets[active]
+        bucket = int.from_bytes(hashlib.blake2b(str(sender_id).encode(), digest_size=2).digest(), 'big') % 100
+        return sets[candidate] if bucket < percent else sets[active]
+
+    def get_stats(self) -> Dict:
+        sets, active, candidate, percent = self._state
+        return {
+            'version': self.version,
+            'source': self.source,
+            'last_error': self.last_error,
+            'active': active,
+            'experiment': {'rule_set': candidate, 'percent': percent},
+            'rule_sets': {name: rs.get_stats() for name, rs in sets.items()},
+        }
+
+
+# Global store used by FraudDetector
+fraud_rules = FraudRuleStore()
@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+
+import httpx
+from decouple import config
+
+# Per-upstream pool settings; each upstream gets its own keep-alive pool so a
+# slow AI call can't starve the rate fetches of connections
+UPSTREAMS = {
+    'exchange_rates': {
+        'timeout': config("EXCHANGE_RATE_HTTP_TIMEOUT", cast=float, default=5.0),
+        'max_connections': config("EXCHANGE_RATE_HTTP_MAX_CONNECTIONS", cast=int, default=20),
+        'max_keepalive_connections': config("EXCHANGE_RATE_HTTP_MAX_KEEPALIVE", cast=int, default=10),
+    },
+    'gemini': {
+        'timeout': config("GEMINI_HTTP_TIMEOUT", cast=float, default=10.0),
+        'max_connections': config("GEMINI_HTTP_MAX_CONNECTIONS", cast=int, default=10),
+        'max_keepalive_connections': config("GEMINI_HTTP_MAX_KEEPALIVE", cast=int, default=5),
+    },
+}
+HTTP_KEEPALIVE_EXPIRY_SECONDS = config("HTTP_KEEPALIVE_EXPIRY_SECONDS", cast=float, default=30.0)
+
+
+class HTTPClientRegistry:
+    """
+    Long-lived httpx.AsyncClient per upstream
+
+    Clients are created on first use and reused for the lifetime of the app,
+    so repeated calls skip the TCP/TLS handshake. Call aclose() on shutdown.
+    """
+
+    def __init__(self, upstreams: Dict[str, Dict]):
+        self.upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get (or lazily create) the pooled client for an upstream"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        settings = self.upstreams.get(name)
+        if settings is None:
+            raise KeyError(f"Unknown upstream: {name}")
+        limits = httpx.Limits(
+            max_connections=settings['max_connections'],
+            max_keepalive_connections=settings['max_keepalive_connections'],
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        return httpx.AsyncClient(timeout=settings['timeout'], limits=limits)
+
+    async def aclose(self, name: Optional[str] = None):
+        """Close one client (or all of them)"""
+        names = [name] if name else list(self._clients.keys())
+        for n in names:
+            client = self._clients.pop(n, None)
+            if client is not None:
+                await client.aclose()
+
+
+# Global registry, closed from the FastAPI shutdown hook
+http_clients = HTTPClientRegistry(UPSTREAMS)
+
+# FastAPI dependency (rate fetches go through rate_cache, which uses the registry directly)
+def get_gemini_client() -> httpx.AsyncClient:
+    return http_clients.get('gemini')
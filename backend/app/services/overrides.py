@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _BandTable:
+    """
+    Amount bands for one (brand, from, to) key, flattened into regions
+
+    The sorted band edges split the amount axis into regions
+    (-inf, p0), [p0], (p0, p1), [p1], ... (pn, +inf). Inside one region the
+    set of matching rules never changes, so at compile time we store, per
+    region, the last matching rule that sets markup and the last that sets
+    fixed_fee. A lookup is then one bisect.
+    """
+
+    def __init__(self, rules: List[Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float]]]):
+        # rules: (seq, amount_min, amount_max, markup, fixed_fee) in config order
+        self.points = sorted({v for _, lo, hi, _, _ in rules for v in (lo, hi) if v is not None})
+        position = {p: i for i, p in enumerate(self.points)}
+        n_regions = 2 * len(self.points) + 1
+
+        self.markup_seq = np.full(n_regions, -1, dtype=np.int64)
+        self.markup_val = np.zeros(n_regions, dtype=np.float64)
+        self.fixed_seq = np.full(n_regions, -1, dtype=np.int64)
+        self.fixed_val = np.zeros(n_regions, dtype=np.float64)
+
+        for seq, lo, hi, markup, fixed_fee in rules:
+            first = 0 if lo is None else 2 * position[lo] + 1
+            last = n_regions - 1 if hi is None else 2 * position[hi] + 1
+            if first > last:
+                continue
+            # Later rules overwrite earlier ones: last match wins
+            if markup is not None:
+                self.markup_seq[first:last + 1] = seq
+                self.markup_val[first:last + 1] = markup
+            if fixed_fee is not None:
+                self.fixed_seq[first:last + 1] = seq
+                self.fixed_val[first:last + 1] = fixed_fee
+
+    def region(self, amount: float) -> int:
+        i = bisect_left(self.points, amount)
+        if i < len(self.points) and self.points[i] == amount:
+            return 2 * i + 1
+        return 2 * i
+
+
+class OverrideIndex:
+    """
+    Compiled view of the competitors.json override rules
+
+    Rules are keyed by (brand, from, to) with None meaning "any", and each
+    key's amount bands are flattened into a _BandTable. Applying overrides
+    checks at most 8 keys with one bisect each, and keeps the original
+    last-match-wins semantics (markup and fixed_fee resolved independently).
+    """
+
+    def __init__(self, rules: List[Dict]):
+        grouped: Dict[Tuple, List] = {}
+        self.skipped = 0
+        for seq, rule in enumerate(rules):
+            compiled = self._compile_rule(rule)
+            if compiled is None:
+                self.skipped += 1
+                continue
+            key, band = compiled
+            grouped.setdefault(key, []).append((seq, *band))
+
+        self.tables: Dict[Tuple, _BandTable] = {key: _BandTable(band_rules) for key, band_rules in grouped.items()}
+        self.size = len(rules) - self.skipped
+
+    def __len__(self) -> int:
+        return self.size
+
+    @staticmethod
+    def _compile_rule(rule: Dict):
+        try:
+            brand = str(rule['brand']).lower() if rule.get('brand') else None
+            from_currency = str(rule['from']).upper() if rule.get('from') else None
+            to_currency = str(rule['to']).upper() if rule.get('to') else None
+            amount_min = float(rule['amount_min']) if rule.get('amount_min') is not None else None
+            amount_max = float(rule['amount_max']) if rule.get('amount_max') is not None else None
+            markup = float(rule['markup']) if 'markup' in rule else None
+            fixed_fee = float(rule['fixed_fee']) if 'fixed_fee' in rule else None
+        except (TypeError, ValueError) as e:
+            print(f"Skipping invalid override rule {rule}: {e}")
+            return None
+        return (brand, from_currency, to_currency), (amount_min, amount_max, markup, fixed_fee)
+
+    def apply(self, brand: str, from_currency: str, to_currency: str, amount: float,
+              markup: float, fixed_fee: float) -> Tuple[float, float]:
+        """Return (markup, fixed_fee) after every matching rule has been applied"""
+        if not self.tables:
+            return markup, fixed_fee
+
+        markup_seq = fixed_seq = -1
+        keys = product((brand.lower(), None), (from_currency.upper(), None), (to_currency.upper(), None))
+        for key in keys:
+            table = self.tables.get(key)
+            if table is None:
+                continue
+            r = table.region(amount)
+            if table.markup_seq[r] > markup_seq:
+                markup_seq = table.markup_seq[r]
+                markup = float(table.markup_val[r])
+            if table.fixed_seq[r] > fixed_seq:
+                fixed_seq = table.fixed_seq[r]
+                fixed_fee = float(table.fixed_val[r])
+        return markup, fixed_fee
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import bcrypt
+from decouple import config
+
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", cast=int, default=2)
+PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", cast=int, default=64)
+
+
+class HasherOverloaded(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool instead of the event loop
+
+    bcrypt releases the GIL while hashing, so a few worker threads keep each
+    100-300 ms hash off the loop. At most max_pending calls may be queued or
+    running; beyond that callers get HasherOverloaded instead of piling up.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def hash(self, password: str) -> str:
+        """Hash password using bcrypt"""
+        return await self._submit(_hash_sync, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify password against hash"""
+        return await self._submit(_verify_sync, password, hashed_password)
+
+    async def _submit(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherOverloaded(f"{self.pending} password hashes already pending")
+
+        self.pending += 1
+        queued_at = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                wait_ms = (started - queued_at) * 1000
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_wait_ms += wait_ms
+                    self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                    self.total_run_ms += (finished - started) * 1000
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+        finally:
+            self.pending -= 1
+
+    def get_stats(self) -> Dict:
+        """Queue depth and timing counters"""
+        with self._lock:
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'running': self.running,
+                'queued': max(0, self.pending - self.running),
+                'completed': completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.total_wait_ms / completed, 2) if completed else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2),
+                'avg_run_ms': round(self.total_run_ms / completed, 2) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop the worker threads (a new pool is started on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _hash_sync(password: str) -> str:
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+def _verify_sync(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+# Global hasher instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+
+@dataclass
+class PricingResult:
+    """
+    Column-oriented pricing for B brands across A amounts
+
+    fees, exchange_rates and recipient_gets all have shape (A, B).
+    Nothing is turned into per-brand dicts until to_dicts() is called.
+    """
+    names: List[str]
+    amounts: np.ndarray
+    fees: np.ndarray
+    exchange_rates: np.ndarray
+    recipient_gets: np.ndarray
+
+    def order(self, row: int = 0) -> np.ndarray:
+        """Brand indices sorted by recipient amount, best first (ties keep input order)"""
+        gets = np.round(self.recipient_gets[row], 2)
+        return np.argsort(-gets, kind='stable')
+
+    def best(self, row: int = 0) -> int:
+        """Index of the brand that delivers the most to the recipient"""
+        return int(self.order(row)[0])
+
+    def to_dict(self, i: int, row: int = 0) -> Dict:
+        amount = float(self.amounts[row])
+        fee = float(self.fees[row, i])
+        return {
+            'name': self.names[i],
+            'fee': round(fee, 2),
+            'fee_percent': f"{(fee / amount) * 100:.2f}%",
+            'exchange_rate': round(float(self.exchange_rates[row, i]), 6),
+            'recipient_gets': round(float(self.recipient_gets[row, i]), 2),
+        }
+
+    def to_dicts(self, row: int = 0, sort: bool = True) -> List[Dict]:
+        """Serialize one amount row, sorted best-first unless sort=False"""
+        indices = self.order(row) if sort else range(len(self.names))
+        return [self.to_dict(int(i), row) for i in indices]
+
+
+def price_channels(names: Sequence[str],
+                   markups: Union[Sequence[float], np.ndarray],
+                   fixed_fees: Union[Sequence[float], np.ndarray],
+                   amounts: Union[float, Sequence[float], np.ndarray],
+                   market_rate: float) -> PricingResult:
+    """
+    Price every brand (and every amount) in one vectorized pass
+
+    Each brand charges amount * markup + fixed_fee and pays out at
+    market_rate * (1 - markup). markups/fixed_fees may be 1-D (one value per
+    brand) or 2-D (A, B) when overrides vary by amount.
+    """
+    amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+    markups = np.asarray(markups, dtype=np.float64)
+    fixed_fees = np.asarray(fixed_fees, dtype=np.float64)
+
+    col_amounts = amounts[:, None]
+    fees = col_amounts * markups + fixed_fees
+    exchange_rates = market_rate * (1 - markups)
+    recipient_gets = (col_amounts - fees) * exchange_rates
+
+    shape = (amounts.size, len(names))
+    return PricingResult(
+        names=list(names),
+        amounts=amounts,
+        fees=np.broadcast_to(fees, shape),
+        exchange_rates=np.broadcast_to(exchange_rates, shape),
+        recipient_gets=np.broadcast_to(recipient_gets, shape),
+    )
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from decouple import config
+
+from app.services.http_clients import http_clients
+
+EXCHANGE_RATE_API_URL = config("EXCHANGE_RATE_API_URL", default="https://api.exchangerate-api.com/v4/latest")
+RATE_CACHE_TTL_SECONDS = config("RATE_CACHE_TTL_SECONDS", cast=float, default=300.0)
+RATE_CACHE_MAX_BASES = config("RATE_CACHE_MAX_BASES", cast=int, default=32)
+RATE_CACHE_MAX_STALE_SECONDS = config("RATE_CACHE_MAX_STALE_SECONDS", cast=float, default=3600.0)
+# After a failed fetch, misses for that base return None without calling upstream for this long
+RATE_CACHE_ERROR_BACKOFF_SECONDS = config("RATE_CACHE_ERROR_BACKOFF_SECONDS", cast=float, default=5.0)
+
+
+class RateTableCache:
+    """
+    Per-base-currency cache of upstream rate tables
+
+    One /latest/{base} response holds the rates for every target currency, so
+    we keep the whole table and answer any (base, target) pair from it.
+    Concurrent misses for the same base share a single in-flight fetch.
+    Expired tables are still served (stale-while-revalidate) for up to
+    max_stale_seconds while a background refresh replaces them.
+    A failed fetch is remembered for error_backoff_seconds: misses (and
+    revalidations) for that base skip the upstream until then, so an outage
+    costs one attempt per base per backoff window rather than one per request.
+    """
+
+    def __init__(self,
+                 base_url: str = EXCHANGE_RATE_API_URL,
+                 ttl_seconds: float = RATE_CACHE_TTL_SECONDS,
+                 max_entries: int = RATE_CACHE_MAX_BASES,
+                 max_stale_seconds: float = RATE_CACHE_MAX_STALE_SECONDS,
+                 error_backoff_seconds: float = RATE_CACHE_ERROR_BACKOFF_SECONDS,
+                 upstream: str = 'exchange_rates'):
+        self.base_url = base_url
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.max_stale_seconds = max_stale_seconds
+        self.error_backoff_seconds = error_backoff_seconds
+        self.upstream = upstream
+
+        # base -> (rates table, monotonic fetch time), kept in LRU order
+        self._entries: "OrderedDict[str, Tuple[Dict[str, float], float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # base -> monotonic time of its last failed fetch
+        self._failed_at: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, Dict[str, float]], None]] = []
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'backoff_hits': 0,
+                      'fetches': 0, 'errors': 0, 'evictions': 0}
+
+    def peek(self, base: str) -> Optional[Dict[str, float]]:
+        """Return the cached table for a base if it is still fresh"""
+        entry = self._entries.get(base)
+        if entry and time.monotonic() - entry[1] < self.ttl_seconds:
+            return entry[0]
+        return None
+
+    async def get_table(self, base: str) -> Optional[Dict[str, float]]:
+        """Get the rate table for a base currency, fetching it on a miss"""
+        entry = self._entries.get(base)
+        if entry is not None:
+            table, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl_seconds:
+                self.stats['hits'] += 1
+                self._entries.move_to_end(base)
+                return table
+            if age < self.ttl_seconds + self.max_stale_seconds:
+                # Serve the stale table now and revalidate in the background
+                self.stats['stale_hits'] += 1
+                self._entries.move_to_end(base)
+                if not self._backing_off(base):
+                    self._start_load(base)
+                return table
+
+        self.stats['misses'] += 1
+        if self._backing_off(base):
+            self.stats['backoff_hits'] += 1
+            return None
+        return await self._load(base)
+
+    async def refresh(self, base: str) -> Optional[Dict[str, float]]:
+        """Force an upstream fetch for a base (joins one already in flight)"""
+        return await self._load(base)
+
+    async def get_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Get a single market rate, or None if the upstream has no answer"""
+        if from_currency == to_currency:
+            return 1.0
+        table = await self.get_table(from_currency)
+        if table and to_currency in table:
+            return table[to_currency]
+        return None
+
+    def add_listener(self, callback: Callable[[str, Dict[str, float]], None]):
+        """Call callback(base, table) whenever a fresh table is stored"""
+        self._listeners.append(callback)
+
+    def store(self, base: str, table: Dict[str, float]):
+        """Insert a freshly fetched table and evict the least recently used bases"""
+        self._entries[base] = (table, time.monotonic())
+        self._entries.move_to_end(base)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        for callback in self._listeners:
+            try:
+                callback(base, table)
+            except Exception as e:
+                print(f"Rate listener error: {e}")
+
+    def invalidate(self, base: Optional[str] = None):
+        """Drop one base (or everything) from the cache"""
+        if base is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(base, None)
+
+    def _backing_off(self, base: str) -> bool:
+        failed_at = self._failed_at.get(base)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at < self.error_backoff_seconds:
+            return True
+        del self._failed_at[base]
+        return False
+
+    def _record_failure(self, base: str):
+        now = time.monotonic()
+        self._failed_at[base] = now
+        if len(self._failed_at) > self.max_entries:
+            # Forget expired failures so unknown bases can't grow this without bound
+            self._failed_at = {b: t for b, t in self._failed_at.items() if now - t < self.error_backoff_seconds}
+
+    def _start_load(self, base: str) -> asyncio.Future:
+        # Single-flight: the first caller starts the fetch, everyone else joins it
+        future = self._inflight.get(base)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(base))
+            self._inflight[base] = future
+            future.add_done_callback(lambda _f, b=base: self._inflight.pop(b, None))
+        return future
+
+    async def _load(self, base: str) -> Optional[Dict[str, float]]:
+        # shield() keeps one cancelled caller from cancelling the shared fetch
+        return await asyncio.shield(self._start_load(base))
+
+    async def _fetch(self, base: str) -> Optional[Dict[str, float]]:
+        self.stats['fetches'] += 1
+        try:
+            client = http_clients.get(self.upstream)
+            response = await client.get(f"{self.base_url}/{base}")
+
+            if response.status_code == 200:
+                rates = response.json().get('rates') or {}
+                table = {code: float(rate) for code, rate in rates.items()}
+                self._failed_at.pop(base, None)
+                self.store(base, table)
+                return table
+
+        except Exception as e:
+            print(f"API Error: {e}")
+
+        self.stats['errors'] += 1
+        self._record_failure(base)
+        return None
+
+    def get_stats(self) -> Dict:
+        """Cache counters for health checks"""
+        now = time.monotonic()
+        return {
+            **self.stats,
+            'cached_bases': list(self._entries.keys()),
+            'inflight': len(self._inflight),
+            'ttl_seconds': self.ttl_seconds,
+            'max_stale_seconds': self.max_stale_seconds,
+            'error_backoff_seconds': self.error_backoff_seconds,
+            'backing_off': [b for b, t in self._failed_at.items() if now - t < self.error_backoff_seconds],
+            'max_entries': self.max_entries,
+        }
+
+
+# Global cache shared by both exchange rate services
+rate_cache = RateTableCache()
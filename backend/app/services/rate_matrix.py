@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.services.rate_cache import rate_cache
+
+CANONICAL_BASE = 'USD'
+MATRIX_CURRENCIES = ['USD', 'EUR', 'GBP', 'CAD', 'AUD', 'PHP', 'MXN', 'INR', 'NGN']
+
+# Demo rates (units per 1 USD), used until the first live table arrives
+FALLBACK_BASE_RATES = {
+    'USD': 1.0, 'EUR': 0.92, 'GBP': 0.79, 'CAD': 1.35, 'AUD': 1.52,
+    'PHP': 56.50, 'MXN': 17.25, 'INR': 83.15, 'NGN': 790.00,
+}
+
+
+class RateMatrix:
+    """
+    Cross-rate matrix derived from one canonical base vector
+
+    base_vector[i] is the number of units of currency i per 1 canonical base.
+    Any cross rate is base_vector[to] / base_vector[from]; the full N x N
+    matrix is rebuilt in one vectorized step whenever the vector changes.
+    """
+
+    def __init__(self,
+                 currencies: Iterable[str] = MATRIX_CURRENCIES,
+                 canonical_base: str = CANONICAL_BASE,
+                 fallback_rates: Dict[str, float] = FALLBACK_BASE_RATES):
+        self.currencies = list(currencies)
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+        self.canonical_base = canonical_base
+
+        fallback_vector = np.array([fallback_rates[c] for c in self.currencies], dtype=np.float64)
+        self._fallback_matrix = self._build_matrix(fallback_vector)
+
+        # (vector, matrix) swapped as one reference so readers never mix versions
+        self._state: Tuple[np.ndarray, np.ndarray] = (fallback_vector, self._fallback_matrix)
+        self.source = 'fallback'
+        self.updated_at: Optional[datetime] = None
+
+    @staticmethod
+    def _build_matrix(vector: np.ndarray) -> np.ndarray:
+        # M[i, j] = rate from currency i to currency j
+        return np.outer(1.0 / vector, vector)
+
+    @property
+    def base_vector(self) -> np.ndarray:
+        return self._state[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._state[1]
+
+    def update_from_table(self, base: str, table: Dict[str, float]):
+        """Rebase an upstream table (units per 1 `base`) onto the canonical vector"""
+        if base not in self.index:
+            return
+        table = {**table, base: 1.0}
+        canonical = table.get(self.canonical_base)
+        if not canonical or canonical <= 0:
+            return
+
+        vector = self.base_vector.copy()
+        for code, i in self.index.items():
+            rate = table.get(code)
+            if rate and rate > 0:
+                vector[i] = rate / canonical
+
+        self._state = (vector, self._build_matrix(vector))
+        self.source = 'live'
+        self.updated_at = datetime.utcnow()
+
+    def cross_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Live (or last known) rate between any two matrix currencies"""
+        i = self.index.get(from_currency)
+        j = self.index.get(to_currency)
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    def fallback_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Static demo rate between any two matrix currencies"""
+        i = self.index.get(from_currency)
+        j = self.index.get(to_currency)
+        if i is None or j is None:
+            return None
+        return float(self._fallback_matrix[i, j])
+
+    def get_status(self) -> Dict:
+        return {
+            'canonical_base': self.canonical_base,
+            'currencies': self.currencies,
+            'source': self.source,
+            'updated_at': self.updated_at,
+        }
+
+
+# Global matrix, kept in step with every table the rate cache fetches
+rate_matrix = RateMatrix()
+rate_cache.add_listener(rate_matrix.update_from_table)
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from decouple import config
+
+from app.services.rate_cache import RateTableCache, rate_cache
+
+RATE_REFRESH_ENABLED = config("RATE_REFRESH_ENABLED", cast=bool, default=True)
+RATE_REFRESH_INTERVAL_SECONDS = config("RATE_REFRESH_INTERVAL_SECONDS", cast=float, default=240.0)
+
+
+class RateRefreshScheduler:
+    """
+    Background task that keeps the rate table cache warm
+
+    Every interval it refreshes the table for each supported base currency, so
+    request handlers only ever read from the cache in steady state.
+    """
+
+    def __init__(self, cache: RateTableCache, interval_seconds: float = RATE_REFRESH_INTERVAL_SECONDS):
+        self.cache = cache
+        self.interval_seconds = interval_seconds
+        self.bases: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+        # Per-base refresh bookkeeping for the status endpoint
+        self.last_refresh: Dict[str, datetime] = {}
+        self.last_latency_ms: Dict[str, float] = {}
+        self.last_ok: Dict[str, bool] = {}
+        self.cycles = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bases: Iterable[str]):
+        """Start the refresh loop for the given base currencies"""
+        self.bases = list(bases)
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the refresh loop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh_all(self):
+        """Refresh every base concurrently"""
+        await asyncio.gather(*(self._refresh_base(base) for base in self.bases))
+        self.cycles += 1
+
+    async def _refresh_base(self, base: str):
+        started = time.perf_counter()
+        table = await self.cache.refresh(base)
+        self.last_latency_ms[base] = round((time.perf_counter() - started) * 1000, 2)
+        self.last_ok[base] = table is not None
+        if table is not None:
+            self.last_refresh[base] = datetime.utcnow()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                print(f"Rate refresh error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def get_status(self) -> Dict:
+        """Last refresh time and latency for each base"""
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval_seconds,
+            'cycles': self.cycles,
+            'bases': {
+                base: {
+                    'last_refresh': self.last_refresh.get(base),
+                    'latency_ms': self.last_latency_ms.get(base),
+                    'ok': self.last_ok.get(base),
+                }
+                for base in self.bases
+            },
+            'cache': self.cache.get_stats(),
+        }
+
+
+# Global scheduler instance (started from the FastAPI startup hook)
+rate_refresher = RateRefreshScheduler(rate_cache)
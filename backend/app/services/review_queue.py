@@ -0,0 +1,265 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from decouple import config
+from sqlalchemy import func, select, update
+
+from app.models.database import AsyncSessionLocal
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.events import EventBus, transaction_events
+from app.services.fraud_detection import fraud_detector
+from app.services.fraud_rules import DECISIONS
+
+REVIEW_WORKERS = config("REVIEW_WORKERS", cast=int, default=4)
+REVIEW_QUEUE_MAX = config("REVIEW_QUEUE_MAX", cast=int, default=1000)
+REVIEW_TIMEOUT_SECONDS = config("REVIEW_TIMEOUT_SECONDS", cast=float, default=10.0)
+REVIEW_MAX_ATTEMPTS = config("REVIEW_MAX_ATTEMPTS", cast=int, default=3)
+REVIEW_RETRY_BASE_SECONDS = config("REVIEW_RETRY_BASE_SECONDS", cast=float, default=2.0)
+
+# Phase-two check weights, added to the phase-one score before re-deciding.
+# Negative weights are clearing signals that can bring a transaction back to "allow"
+REVIEW_FAN_IN_SENDERS = 5
+REVIEW_NEW_ACCOUNT_AGE = timedelta(days=1)
+REVIEW_NEW_ACCOUNT_AMOUNT = 500.0
+REVIEW_ESTABLISHED_AGE = timedelta(days=30)
+REVIEW_WEIGHTS = {
+    "recipient_fan_in": 30,
+    "new_account_high_amount": 20,
+    "established_sender": -20,
+}
+
+# Status while queued for phase two, and the status each final decision maps to
+REVIEW_STATUS = "review"
+REVIEW_OUTCOME_STATUS = {"allow": "pending", "review": "manual_review", "block": "blocked"}
+# Terminal status when every review attempt failed
+REVIEW_FAILED_STATUS = "review_failed"
+
+
+class ReviewQueueFull(Exception):
+    pass
+
+
+class ReviewQueue:
+    """
+    Phase two of fraud screening, off the /send request path
+
+    Transactions that phase one scores as "review" are committed with status
+    "review" and queued here. A fixed pool of workers runs the slower checks
+    (DB enrichment), updates Transaction.status and publishes the change on
+    the event bus. The queue is bounded: when it is full submit() raises
+    ReviewQueueFull and the transaction stays in "review" until the next
+    start() re-queues it.
+
+    A review that raises or times out is retried with exponential backoff,
+    up to max_attempts; after that the transaction moves to "review_failed".
+    Outcomes are written with UPDATE ... WHERE status = 'review', so when
+    several worker processes pick up the same row only the first write
+    counts and only it publishes an event.
+    """
+
+    def __init__(self, workers: int = REVIEW_WORKERS, max_size: int = REVIEW_QUEUE_MAX,
+                 timeout_seconds: float = REVIEW_TIMEOUT_SECONDS, events: EventBus = transaction_events,
+                 max_attempts: int = REVIEW_MAX_ATTEMPTS, retry_base_seconds: float = REVIEW_RETRY_BASE_SECONDS):
+        self.workers = max(1, workers)
+        self.max_size = max(1, max_size)
+        self.timeout_seconds = timeout_seconds
+        self.events = events
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Backoff waits and give-up writes in flight, cancelled on stop()
+        self._pending: Set[asyncio.Task] = set()
+        self.stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'recovered': 0,
+                      'retried': 0, 'gave_up': 0, 'superseded': 0}
+        self.total_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self):
+        """Start the workers and re-queue anything left in "review" by a previous run"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            async with AsyncSessionLocal() as db:
+                ids = (await db.scalars(
+                    select(Transaction.id).where(Transaction.status == REVIEW_STATUS)
+                    .order_by(Transaction.id).limit(self.max_size)
+                )).all()
+            for transaction_id in ids:
+                self._queue.put_nowait((transaction_id, None, 1))
+                self.stats['recovered'] += 1
+        except Exception as e:
+            print(f"Review queue recovery error: {e}")
+
+    async def stop(self):
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def submit(self, transaction_id: int, phase_one: Optional[Dict] = None):
+        """Queue a transaction for phase two (never blocks)"""
+        if self._queue is None or not self.running:
+            self.stats['rejected'] += 1
+            raise ReviewQueueFull("Review workers are not running")
+        try:
+            self._queue.put_nowait((transaction_id, phase_one, 1))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise ReviewQueueFull(f"{self._queue.qsize()} transactions already queued for review")
+        self.stats['submitted'] += 1
+
+    async def _worker(self):
+        while True:
+            transaction_id, phase_one, attempt = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.review(transaction_id, phase_one), self.timeout_seconds)
+                self.stats['completed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"Fraud review Error (attempt {attempt}/{self.max_attempts}): {e}")
+                self._retry_later((transaction_id, phase_one, attempt))
+            finally:
+                self.total_ms += (time.perf_counter() - started) * 1000
+                self._queue.task_done()
+
+    def _retry_later(self, item: Tuple[int, Optional[Dict], int]):
+        """Re-queue a failed review after exponential backoff, or give up after max_attempts"""
+        transaction_id, phase_one, attempt = item
+        if attempt >= self.max_attempts:
+            task = asyncio.create_task(self._give_up(transaction_id))
+        else:
+            task = asyncio.create_task(self._requeue((transaction_id, phase_one, attempt + 1),
+                                                     self.retry_base_seconds * 2 ** (attempt - 1)))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _requeue(self, item: Tuple[int, Optional[Dict], int], delay: float):
+        await asyncio.sleep(delay)
+        try:
+            self._queue.put_nowait(item)
+            self.stats['retried'] += 1
+        except asyncio.QueueFull:
+            # Wait out the same backoff again without spending an attempt
+            transaction_id, phase_one, attempt = item
+            self._retry_later((transaction_id, phase_one, attempt - 1))
+
+    async def _give_up(self, transaction_id: int):
+        try:
+            async with AsyncSessionLocal() as db:
+                updated = await self._finish(db, transaction_id, REVIEW_FAILED_STATUS)
+            if not updated:
+                return
+        except Exception as e:
+            print(f"Fraud review give-up Error: {e}")
+            return
+        self.stats['gave_up'] += 1
+        self.events.publish(transaction_id, {
+            'event': 'status',
+            'transaction_id': transaction_id,
+            'status': REVIEW_FAILED_STATUS,
+            'reviewed_at': datetime.utcnow().isoformat(),
+        })
+
+    async def _finish(self, db, transaction_id: int, status: str, fraud_score: Optional[int] = None) -> bool:
+        """Write the outcome only if the row is still in review; True if this call moved it"""
+        values = {'status': status}
+        if fraud_score is not None:
+            values['fraud_score'] = fraud_score
+        result = await db.execute(
+            update(Transaction)
+            .where(Transaction.id == transaction_id, Transaction.status == REVIEW_STATUS)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            self.stats['superseded'] += 1
+            return False
+        return True
+
+    async def review(self, transaction_id: int, phase_one: Optional[Dict] = None) -> Optional[Dict]:
+        """Run the slow checks for one transaction and record the outcome"""
+        async with AsyncSessionLocal() as db:
+            transaction = await db.get(Transaction, transaction_id)
+            if transaction is None or transaction.status != REVIEW_STATUS:
+                return None
+
+            flags = await self.enrich(db, transaction)
+            rule_set = fraud_detector.rules.select(transaction.sender_id)
+            base_score = phase_one['score'] if phase_one else (transaction.fraud_score or 0)
+            score = max(0, min(100, base_score + sum(REVIEW_WEIGHTS[f] for f in flags)))
+            decision = str(DECISIONS[rule_set.decide(score)])
+
+            if not await self._finish(db, transaction_id, REVIEW_OUTCOME_STATUS[decision], score):
+                # Another worker reviewed it first
+                return None
+
+        result = {
+            'transaction_id': transaction_id,
+            'status': REVIEW_OUTCOME_STATUS[decision],
+            'fraud_score': score,
+            'review_flags': flags,
+            'reviewed_at': datetime.utcnow().isoformat(),
+        }
+        self.events.publish(transaction_id, {'event': 'status', **result})
+        return result
+
+    async def enrich(self, db, transaction: Transaction) -> List[str]:
+        """Checks too slow for the request path; returns the flags that fired"""
+        flags = []
+        since = (transaction.created_at or datetime.utcnow()) - timedelta(days=7)
+        senders = await db.scalar(
+            select(func.count(func.distinct(Transaction.sender_id)))
+            .where(Transaction.recipient_email == transaction.recipient_email, Transaction.created_at >= since)
+        )
+        if (senders or 0) >= REVIEW_FAN_IN_SENDERS:
+            flags.append("recipient_fan_in")
+
+        sender = await db.get(User, transaction.sender_id)
+        if sender is None or sender.created_at is None:
+            return flags
+        account_age = (transaction.created_at or datetime.utcnow()) - sender.created_at
+        if account_age < REVIEW_NEW_ACCOUNT_AGE and (transaction.amount or 0) >= REVIEW_NEW_ACCOUNT_AMOUNT:
+            flags.append("new_account_high_amount")
+        elif account_age >= REVIEW_ESTABLISHED_AGE and not flags:
+            # Long-standing sender with nothing previously held or blocked
+            held = await db.scalar(
+                select(func.count(Transaction.id))
+                .where(Transaction.sender_id == sender.id,
+                       Transaction.status.in_(("manual_review", "blocked")))
+            )
+            if not held:
+                flags.append("established_sender")
+        return flags
+
+    def get_stats(self) -> Dict:
+        done = self.stats['completed'] + self.stats['failed']
+        return {
+            **self.stats,
+            'running': self.running,
+            'workers': self.workers,
+            'max_size': self.max_size,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'avg_review_ms': round(self.total_ms / done, 2) if done else 0.0,
+        }
+
+
+# Global queue, started with the app
+review_queue = ReviewQueue()
@@ -0,0 +1,145 @@
+import asyncio
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from decouple import config
+from sqlalchemy import select
+
+from app.models.database import AsyncSessionLocal
+from app.models.transaction import Transaction
+from app.services.blockchain_store import FINAL_STATUSES, BlockchainStore, blockchain_store
+from app.services.events import EventBus, Subscription, blockchain_events, transaction_events
+from app.services.review_queue import REVIEW_STATUS
+
+STREAM_BUFFER = config("STREAM_BUFFER", cast=int, default=64)
+STREAM_MAX_TOPICS = config("STREAM_MAX_TOPICS", cast=int, default=200)
+
+# Transaction statuses a watcher keeps waiting through; anything else is final
+WAITING_STATUSES = {REVIEW_STATUS}
+
+
+class TooManyTopics(ValueError):
+    pass
+
+
+def transaction_status(transaction: Transaction) -> Dict:
+    return {
+        'transaction_id': transaction.id,
+        'status': transaction.status,
+        'fraud_score': transaction.fraud_score,
+        'final': transaction.status not in WAITING_STATUSES,
+    }
+
+
+def blockchain_status(record: Dict) -> Dict:
+    return {
+        'transaction_hash': record['hash'],
+        'status': record['status'],
+        'confirmations': record['confirmations'],
+        'required_confirmations': record['required_confirmations'],
+        'confirmed_at': record['confirmed_at'].isoformat() if record['confirmed_at'] else None,
+        'final': record['status'] in FINAL_STATUSES,
+    }
+
+
+class StatusWatch:
+    """
+    Push status for one connection's transaction ids and blockchain hashes
+
+    Every topic feeds a single Subscription, so a connection buffers at most
+    buffer_size events however many topics it watches (up to max_topics).
+    When a slow reader loses events to the bound, next() reports how many
+    were dropped so the client can re-fetch. Only the user's own transaction
+    ids can be watched; hashes are public, like the explorer links.
+    """
+
+    def __init__(self, user_id: int, buffer_size: int = STREAM_BUFFER, max_topics: int = STREAM_MAX_TOPICS,
+                 transactions: EventBus = transaction_events, blockchain: EventBus = blockchain_events,
+                 store: BlockchainStore = blockchain_store):
+        self.user_id = user_id
+        self.max_topics = max_topics
+        self.transactions = transactions
+        self.blockchain = blockchain
+        self.store = store
+        self.subscription = Subscription(buffer_size)
+        # Topics whose status isn't final yet
+        self.waiting: Set[Tuple[str, Hashable]] = set()
+        self._reported_dropped = 0
+
+    @property
+    def done(self) -> bool:
+        return not self.waiting
+
+    async def add(self, transaction_ids: Iterable[int] = (), hashes: Iterable[str] = ()) -> List[Dict]:
+        """Watch more topics; returns their current status (one "status" event each)"""
+        transaction_ids = [i for i in dict.fromkeys(transaction_ids)]
+        hashes = [h for h in dict.fromkeys(hashes)]
+        if len(self.subscription.topics) + len(transaction_ids) + len(hashes) > self.max_topics:
+            raise TooManyTopics(f"At most {self.max_topics} transactions and hashes per stream")
+
+        # Subscribe before reading the status so a change in between isn't missed
+        for transaction_id in transaction_ids:
+            self.transactions.subscribe(transaction_id, self.subscription)
+        for tx_hash in hashes:
+            self.blockchain.subscribe(tx_hash, self.subscription)
+
+        snapshot = []
+        if transaction_ids:
+            async with AsyncSessionLocal() as db:
+                owned = {t.id: t for t in (await db.scalars(
+                    select(Transaction).where(Transaction.id.in_(transaction_ids),
+                                              Transaction.sender_id == self.user_id)
+                )).all()}
+            for transaction_id in transaction_ids:
+                if transaction_id in owned:
+                    snapshot.append(self._track('transaction', transaction_id, transaction_status(owned[transaction_id])))
+                else:
+                    self.transactions.unsubscribe(transaction_id, self.subscription)
+                    snapshot.append({'event': 'status', 'transaction_id': transaction_id,
+                                     'status': 'not_found', 'final': True})
+        for tx_hash in hashes:
+            record = await self.store.get(tx_hash)
+            if record is not None:
+                snapshot.append(self._track('hash', tx_hash, blockchain_status(record)))
+            else:
+                self.blockchain.unsubscribe(tx_hash, self.subscription)
+                snapshot.append({'event': 'status', 'transaction_hash': tx_hash, 'status': 'not_found', 'final': True})
+        return snapshot
+
+    def remove(self, transaction_ids: Iterable[int] = (), hashes: Iterable[str] = ()):
+        for transaction_id in transaction_ids:
+            self.transactions.unsubscribe(transaction_id, self.subscription)
+            self.waiting.discard(('transaction', transaction_id))
+        for tx_hash in hashes:
+            self.blockchain.unsubscribe(tx_hash, self.subscription)
+            self.waiting.discard(('hash', tx_hash))
+
+    def _track(self, kind: str, key: Hashable, payload: Dict, event: str = 'status') -> Dict:
+        if payload['final']:
+            self.waiting.discard((kind, key))
+        else:
+            self.waiting.add((kind, key))
+        return {'event': event, **payload}
+
+    def _payload(self, event: Dict) -> Dict:
+        payload = {k: v for k, v in event.items() if k != 'event'}
+        if 'transaction_hash' in payload:
+            payload['final'] = payload.get('status') in FINAL_STATUSES
+            return self._track('hash', payload['transaction_hash'], payload, event.get('event', 'status'))
+        payload['final'] = payload.get('status') not in WAITING_STATUSES
+        return self._track('transaction', payload.get('transaction_id'), payload, event.get('event', 'status'))
+
+    async def next(self, timeout: float) -> Optional[Dict]:
+        """Next event for the client, or None if nothing arrived within timeout"""
+        if self.subscription.dropped > self._reported_dropped:
+            dropped = self.subscription.dropped - self._reported_dropped
+            self._reported_dropped = self.subscription.dropped
+            return {'event': 'dropped', 'count': dropped}
+        try:
+            event = await asyncio.wait_for(self.subscription.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self._payload(event)
+
+    def close(self):
+        self.subscription.close()
+        self.waiting.clear()
@@ -0,0 +1,163 @@
+from array import array
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from decouple import config
+
+VELOCITY_MINUTE_BUCKETS = config("VELOCITY_MINUTE_BUCKETS", cast=int, default=120)
+VELOCITY_HOUR_BUCKETS = config("VELOCITY_HOUR_BUCKETS", cast=int, default=24 * 8)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(ts: datetime) -> float:
+    return (ts - _EPOCH).total_seconds()
+
+
+class BucketRing:
+    """
+    Fixed ring of time buckets holding a count and an amount sum each
+
+    Slot i holds absolute bucket number b where b % size == i. Buckets that
+    fall off the back are zeroed as the head advances, so memory is fixed at
+    `size` slots. Counts and sums are kept in Fenwick trees over the slots,
+    so adds and range queries are O(log size).
+    """
+
+    __slots__ = ('bucket_seconds', 'size', 'head', '_counts', '_sums', '_slot_counts', '_slot_sums')
+
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = max(1, size)
+        # Absolute bucket number of the newest slot (None until the first event)
+        self.head: Optional[int] = None
+        self._counts = array('d', bytes(8 * (self.size + 1)))
+        self._sums = array('d', bytes(8 * (self.size + 1)))
+        self._slot_counts = array('d', bytes(8 * self.size))
+        self._slot_sums = array('d', bytes(8 * self.size))
+
+    @property
+    def horizon_seconds(self) -> int:
+        return self.bucket_seconds * self.size
+
+    def bucket(self, seconds: float) -> int:
+        return int(seconds // self.bucket_seconds)
+
+    def _update(self, slot: int, count: float, amount: float):
+        self._slot_counts[slot] += count
+        self._slot_sums[slot] += amount
+        i = slot + 1
+        while i <= self.size:
+            self._counts[i] += count
+            self._sums[i] += amount
+            i += i & -i
+
+    def _prefix(self, slot: int) -> Tuple[float, float]:
+        """Count and sum over slots [0, slot)"""
+        count = total = 0.0
+        i = slot
+        while i > 0:
+            count += self._counts[i]
+            total += self._sums[i]
+            i -= i & -i
+        return count, total
+
+    def _clear(self, slot: int):
+        count, amount = self._slot_counts[slot], self._slot_sums[slot]
+        if count or amount:
+            self._update(slot, -count, -amount)
+            # Drop float residue so an empty slot is exactly empty
+            self._slot_counts[slot] = 0.0
+            self._slot_sums[slot] = 0.0
+
+    def advance(self, bucket: int):
+        """Move the head forward to `bucket`, zeroing the slots that expire"""
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        if bucket - self.head >= self.size:
+            for slot in range(self.size):
+                self._clear(slot)
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                self._clear(b % self.size)
+        self.head = bucket
+
+    def add(self, seconds: float, amount: float):
+        b = self.bucket(seconds)
+        self.advance(b)
+        if b <= self.head - self.size:
+            return  # older than the ring holds
+        self._update(b % self.size, 1.0, amount)
+
+    def count_sum(self, start_bucket: int, end_bucket: int) -> Tuple[int, float]:
+        """Count and sum over absolute buckets [start_bucket, end_bucket] (clipped to the ring)"""
+        if self.head is None:
+            return 0, 0.0
+        end_bucket = min(end_bucket, self.head)
+        start_bucket = max(start_bucket, self.head - self.size + 1)
+        if start_bucket > end_bucket:
+            return 0, 0.0
+        lo, hi = start_bucket % self.size, end_bucket % self.size
+        if lo <= hi:
+            c_hi, s_hi = self._prefix(hi + 1)
+            c_lo, s_lo = self._prefix(lo)
+            count, total = c_hi - c_lo, s_hi - s_lo
+        else:
+            # Range wraps around the end of the ring
+            c_all, s_all = self._prefix(self.size)
+            c_lo, s_lo = self._prefix(lo)
+            c_hi, s_hi = self._prefix(hi + 1)
+            count, total = c_all - c_lo + c_hi, s_all - s_lo + s_hi
+        return int(round(count)), total
+
+
+class VelocityCounter:
+    """
+    Per-sender "count and sum in the last W" over tiered bucket rings
+
+    Defaults: 120 one-minute buckets (windows up to 2h) and 192 one-hour
+    buckets (up to 8 days). A query uses the finest tier whose horizon covers
+    W; the oldest bucket is counted whole, so results can include up to one
+    bucket's worth of events older than W.
+
+    A counter only sees the events added to it in this process. The live
+    per-sender counters are rebuilt from the table whenever fraud_features
+    re-hydrates the sender (see FRAUD_FEATURES_MAX_AGE_SECONDS), which is
+    what keeps them close to other workers' inserts.
+    """
+
+    __slots__ = ('tiers',)
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]] = ((60, VELOCITY_MINUTE_BUCKETS),
+                                                          (3600, VELOCITY_HOUR_BUCKETS))):
+        self.tiers = tuple(BucketRing(seconds, size) for seconds, size in tiers)
+
+    def add(self, created_at: datetime, amount: float):
+        seconds = _seconds(created_at)
+        for ring in self.tiers:
+            ring.add(seconds, amount)
+
+    def count_sum(self, window_seconds: float, now: datetime) -> Tuple[int, float]:
+        """Events in the buckets covering [now - window, now]; windows past the largest horizon are clipped"""
+        now_s = _seconds(now)
+        ring = next((r for r in self.tiers if r.horizon_seconds >= window_seconds), self.tiers[-1])
+        end = ring.bucket(now_s)
+        ring.advance(end)
+        start = ring.bucket(now_s - window_seconds)
+        return ring.count_sum(start, end)
+
+    def count(self, window_seconds: float, now: datetime) -> int:
+        return self.count_sum(window_seconds, now)[0]
+
+    def sum(self, window_seconds: float, now: datetime) -> float:
+        return self.count_sum(window_seconds, now)[1]
+
+    @property
+    def max_window_seconds(self) -> int:
+        return max(r.horizon_seconds for r in self.tiers)
+
+    def memory_bytes(self) -> int:
+        return sum(4 * 8 * r.size + 8 for r in self.tiers)
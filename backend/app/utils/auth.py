@@ -1,46 +1,179 @@
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from decouple import config
-from fastapi import Depends, HTTPException, status
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
 
-from app.models.database import get_db
+from app.models.database import AsyncSessionLocal, get_async_db
 from app.models.user import User
 
 security = HTTPBearer()
 
-# Same constants as in auth.py
+# Token settings shared with routes/auth.py, which issues the tokens
 SECRET_KEY = config("SECRET_KEY", default="dev-do-not-use")
-ALGORITHM = "HS256"
+ALGORITHM = config("ALGORITHM", default="HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int, default=60)
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+AUTH_CACHE_SIZE = config("AUTH_CACHE_SIZE", cast=int, default=10000)
+# A cached token is re-checked against the users table at least this often
+AUTH_CACHE_TTL_SECONDS = config("AUTH_CACHE_TTL_SECONDS", cast=float, default=300.0)
+
+ADMIN_TOKEN = config("ADMIN_TOKEN", default=None)
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency for admin-only endpoints: X-Admin-Token must match ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller as carried in the token; enough for routes that only need the id"""
+    id: int
+    email: str
+
+
+class TokenCache:
     """
-    Dependency to get current user from JWT token
-    Use this in your protected routes like: current_user: User = Depends(get_current_user)
+    LRU of verified tokens -> Principal
+
+    A miss decodes the JWT and confirms the user still exists with one
+    primary-key lookup on the "uid" claim (older tokens with only "sub" are
+    looked up by email instead). The resulting Principal is cached until the
+    token's own exp or ttl_seconds, whichever comes first, and hits touch
+    neither the signature nor the users table.
+
+    The users table stays the source of truth, so a deleted user's tokens
+    stop working in every worker (and after restarts) within ttl_seconds.
+    invalidate_user() drops a user's entries from this process's cache at
+    once; it runs on ORM updates and deletes of User, so a changed email or
+    a deletion takes effect on that user's next request here.
     """
-    
-    credentials_exception = HTTPException(
+
+    def __init__(self, max_entries: int = AUTH_CACHE_SIZE, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        # token -> (principal, valid until epoch seconds), in LRU order
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'invalidations': 0}
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[0].id]
+
+    def _store(self, token: str, principal: Principal, exp: Optional[float]):
+        valid_until = time.time() + self.ttl_seconds
+        if exp is not None:
+            valid_until = min(valid_until, exp)
+        self._entries[token] = (principal, valid_until)
+        self._entries.move_to_end(token)
+        self._by_user.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    async def verify(self, token: str) -> Optional[Principal]:
+        """Principal for a raw JWT, or None if it is invalid, expired or its user is gone"""
+        entry = self._entries.get(token)
+        if entry is not None:
+            if entry[1] > time.time():
+                self._entries.move_to_end(token)
+                self.stats['hits'] += 1
+                return entry[0]
+            self._drop(token)
+        self.stats['misses'] += 1
+
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            self.stats['rejected'] += 1
+            return None
+        email = payload.get("sub")
+        if email is None:
+            self.stats['rejected'] += 1
+            return None
+
+        user_id = payload.get("uid")
+        # Tokens issued before "uid" was added are resolved by email
+        condition = User.id == user_id if user_id is not None else User.email == email
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(select(User.id, User.email).where(condition))).first()
+        if row is None:
+            self.stats['rejected'] += 1
+            return None
+
+        principal = Principal(id=row.id, email=row.email)
+        self._store(token, principal, payload.get("exp"))
+        return principal
+
+    def invalidate_user(self, user_id: int):
+        """Hook for user changes: forget the user's cached tokens so the next request re-checks the row"""
+        for token in list(self._by_user.get(user_id, ())):
+            self._drop(token)
+        self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+# Global cache behind every authenticated route
+token_cache = TokenCache()
+
+
+# Re-check the users row on the next request after an ORM update or delete
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        
-        if email is None:
-            raise credentials_exception
-            
-    except jwt.PyJWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """
+    Dependency for routes that only need the caller's id (no users query on a cache hit)
+    Use it like: current_user: Principal = Depends(get_current_principal)
+    """
+    principal = await token_cache.verify(credentials.credentials)
+    if principal is None:
+        raise credentials_exception()
+    return principal
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to get the full User row for the token (one primary-key lookup)
+    Use this in your protected routes like: current_user: User = Depends(get_current_user)
+    """
+    user = await db.get(User, principal.id)
     if user is None:
-        raise credentials_exception
-        
-    return user
\ No newline at end of file
+        token_cache.invalidate_user(principal.id)
+        raise credentials_exception()
+    return user
@@ -1,3 +1,4 @@
+import base64
 import re
 import uuid
 import hashlib
@@ -324,4 +325,18 @@ def generate_demo_transactions(user_id: int, count: int = 5) -> List[Dict]:
         
         transactions.append(transaction)
     
-    return transactions
\ No newline at end of file
+    return transactions
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for (created_at, id) ordered pages"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, row_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,142 @@
+"""
+Mixed read/write DB benchmark: sync Session vs AsyncSession in async handlers
+
+Builds two tiny apps over the real models. "sync" uses SessionLocal inside
+async def handlers (the old pattern, blocking the event loop on every query);
+"async" uses AsyncSessionLocal. Each is driven over ASGI with the same mix of
+history reads and transaction inserts, reporting requests/sec, p99 latency
+and event-loop lag (how late a 1 ms timer fires while the load runs).
+
+Usage (from backend/):  python -m benchmarks.bench_async_db [REQUESTS] [CONCURRENCY] [WRITE_RATIO]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app.models.database import AsyncSessionLocal, Base, SessionLocal, engine  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+N_USERS = 50
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        for i in range(N_USERS):
+            db.add(User(email=f"bench{i}@example.com", name=f"Bench {i}", hashed_password="x", country="US"))
+        db.commit()
+
+
+def new_transaction(user_id: int) -> Transaction:
+    return Transaction(
+        sender_id=user_id, recipient_email="r@example.com", recipient_name="R",
+        amount=random.uniform(10, 2000), source_currency="USD", target_currency="PHP",
+        exchange_rate=56.5, fees=5.0, status="pending", fraud_score=0,
+    )
+
+
+def history_query(user_id: int):
+    return (select(Transaction).where(Transaction.sender_id == user_id)
+            .order_by(Transaction.created_at.desc()).limit(10))
+
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/history/{user_id}")
+    async def history(user_id: int):
+        with SessionLocal() as db:
+            return len(db.scalars(history_query(user_id)).all())
+
+    @app.post("/send/{user_id}")
+    async def send(user_id: int):
+        with SessionLocal() as db:
+            db.add(new_transaction(user_id))
+            db.commit()
+        return True
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/history/{user_id}")
+    async def history(user_id: int):
+        async with AsyncSessionLocal() as db:
+            return len((await db.scalars(history_query(user_id))).all())
+
+    @app.post("/send/{user_id}")
+    async def send(user_id: int):
+        async with AsyncSessionLocal() as db:
+            db.add(new_transaction(user_id))
+            await db.commit()
+        return True
+
+    return app
+
+
+async def loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append((time.perf_counter() - started) * 1000 - 1.0)
+
+
+async def drive(name: str, app: FastAPI, n: int, concurrency: int, write_ratio: float):
+    rng = random.Random(7)
+    plan = [("post" if rng.random() < write_ratio else "get", rng.randint(1, N_USERS)) for _ in range(n)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+    lag: list = []
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(method: str, user_id: int):
+            async with semaphore:
+                started = time.perf_counter()
+                if method == "post":
+                    await client.post(f"/send/{user_id}")
+                else:
+                    await client.get(f"/history/{user_id}")
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        lag_task = asyncio.create_task(loop_lag(stop, lag))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(m, u) for m, u in plan))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await lag_task
+
+    latencies.sort()
+    lag.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    lag_p99 = lag[int(len(lag) * 0.99) - 1] if lag else 0.0
+    print(f"{name:6s} {n / elapsed:8.1f} req/s   p99 {p99:8.2f} ms   loop lag p99 {lag_p99:8.2f} ms")
+
+
+async def main(n: int, concurrency: int, write_ratio: float):
+    seed()
+    print(f"requests={n} concurrency={concurrency} write_ratio={write_ratio}")
+    await drive("sync", build_sync_app(), n, concurrency, write_ratio)
+    await drive("async", build_async_app(), n, concurrency, write_ratio)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(
+        int(args[0]) if len(args) > 0 else 2000,
+        int(args[1]) if len(args) > 1 else 20,
+        float(args[2]) if len(args) > 2 else 0.2,
+    ))
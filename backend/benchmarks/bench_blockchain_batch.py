@@ -0,0 +1,79 @@
+"""
+Blockchain submission throughput: initiate_transaction one by one vs initiate_batch
+
+Both paths run against a fresh SQLite database through the real
+BlockchainService and BlockchainStore. "single" awaits one
+initiate_transaction per transfer (one INSERT + commit each); "batch"
+submits the same transfers through initiate_batch in chunks of BATCH_SIZE.
+Confirmations are not scheduled, so only submission is measured.
+
+Usage (from backend/):  python -m benchmarks.bench_blockchain_batch [TRANSFERS] [BATCH_SIZE]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.models.blockchain import BlockchainTransaction  # noqa: E402
+from app.models.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.services.blockchain import BlockchainService  # noqa: E402
+from app.services.blockchain_store import BlockchainStore  # noqa: E402
+
+
+class SubmitOnlyService(BlockchainService):
+    def _schedule_confirmation(self, tx):
+        pass
+
+
+def make_transfers(n: int):
+    rng = random.Random(7)
+    return [{
+        'amount': round(rng.choice([rng.uniform(10, 2000), rng.uniform(5000, 15000)]), 2),
+        'sender_address': "0x" + "a" * 40,
+        'recipient_address': f"0x{rng.getrandbits(160):040x}",
+    } for _ in range(n)]
+
+
+async def run_single(service: BlockchainService, transfers) -> float:
+    started = time.perf_counter()
+    for t in transfers:
+        await service.initiate_transaction(t['amount'], t['sender_address'], t['recipient_address'], 'polygon')
+    return time.perf_counter() - started
+
+
+async def run_batch(service: BlockchainService, transfers, batch_size: int) -> float:
+    started = time.perf_counter()
+    for i in range(0, len(transfers), batch_size):
+        await service.initiate_batch(transfers[i:i + batch_size], 'polygon')
+    return time.perf_counter() - started
+
+
+async def main(n: int, batch_size: int):
+    Base.metadata.create_all(bind=engine)
+    transfers = make_transfers(n)
+    print(f"transfers={n} batch_size={batch_size}")
+
+    for name, runner in (("single", lambda s: run_single(s, transfers)),
+                         ("batch", lambda s: run_batch(s, transfers, batch_size))):
+        service = SubmitOnlyService(BlockchainStore())
+        elapsed = await runner(service)
+        print(f"{name:6s} {n / elapsed:10.1f} tx/s   {elapsed * 1000:9.1f} ms total")
+
+    async with AsyncSessionLocal() as db:
+        stored = await db.scalar(select(func.count(BlockchainTransaction.id)))
+    print(f"rows stored: {stored} (expected {2 * n})")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(
+        int(args[0]) if len(args) > 0 else 5000,
+        int(args[1]) if len(args) > 1 else 500,
+    ))
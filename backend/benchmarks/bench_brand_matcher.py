@@ -0,0 +1,89 @@
+"""
+Benchmark store-name normalization for /api/rates/nearby-channels
+
+Compares the old per-alias substring scan with the Aho-Corasick matcher
+(cold, then with the memo cache warm) on synthetic POI lists, using the real
+competitors.json aliases plus a padded alias table to show how each scales.
+
+Usage (from backend/):  python -m benchmarks.bench_brand_matcher [N_STORES] [EXTRA_ALIASES]
+"""
+import random
+import string
+import sys
+import time
+
+from app.services.brand_matcher import BrandMatcher
+from app.services.competitors import competitor_store
+
+BRAND_ALIASES = dict(competitor_store.current.brand_aliases)
+BRAND_NAME_MAP = dict(competitor_store.current.brand_name_map)
+
+WORDS = ["market", "pharmacy", "gas", "station", "plaza", "supercenter", "express",
+         "cafe", "bank", "center", "store", "mart", "deli", "shop", "houston"]
+
+
+def naive_match_all(store_names, brand_name_map, aliases):
+    # The original nearby_channels loop
+    present = set()
+    for s in store_names:
+        s_low = s.strip().lower()
+        if not s_low:
+            continue
+        if s_low in brand_name_map:
+            present.add(brand_name_map[s_low])
+            continue
+        if s_low in aliases:
+            present.add(aliases[s_low])
+            continue
+        for alias, canonical in aliases.items():
+            if alias in s_low:
+                present.add(canonical)
+    return present
+
+
+def synthetic_stores(n, aliases, rng):
+    alias_list = list(aliases.keys())
+    stores = []
+    for _ in range(n):
+        words = rng.sample(WORDS, 3)
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(4), rng.choice(alias_list))
+        stores.append(" ".join(words).title() + f" #{rng.randrange(1000)}")
+    return stores
+
+
+def padded_aliases(extra, rng):
+    aliases = dict(BRAND_ALIASES)
+    brands = list(BRAND_NAME_MAP.values())
+    for _ in range(extra):
+        alias = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 14)))
+        aliases[alias] = rng.choice(brands)
+    return aliases
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(n_stores, aliases, rng):
+    stores = synthetic_stores(n_stores, aliases, rng)
+    matcher = BrandMatcher(BRAND_NAME_MAP, aliases)
+
+    expected, naive_ms = timed(naive_match_all, stores, BRAND_NAME_MAP, aliases)
+    cold, cold_ms = timed(matcher.match_all, stores)
+    warm, warm_ms = timed(matcher.match_all, stores)
+    assert expected == cold == warm, "matcher disagrees with naive scan"
+
+    print(f"  aliases={len(aliases):5d} stores={n_stores:5d}  "
+          f"naive {naive_ms:8.2f} ms | automaton {cold_ms:7.2f} ms | memoized {warm_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    n_stores = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    extra = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(42)
+    print("brand matcher benchmark")
+    run(n_stores, dict(BRAND_ALIASES), rng)
+    run(n_stores, padded_aliases(extra, rng), rng)
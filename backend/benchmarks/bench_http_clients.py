@@ -0,0 +1,76 @@
+"""
+Compare a new httpx.AsyncClient per request against the pooled registry client
+
+Starts a local keep-alive stub of the exchange rate API and times N sequential
+rate fetches both ways.
+
+Usage (from backend/):  python -m benchmarks.bench_http_clients [N]
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.services.http_clients import http_clients
+
+PAYLOAD = json.dumps({'base': 'USD', 'rates': {'PHP': 56.5, 'MXN': 17.25, 'INR': 83.15}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/latest/USD"
+
+
+async def per_call_clients(url: str, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            (await client.get(url)).json()
+    return time.perf_counter() - started
+
+
+async def pooled_client(url: str, n: int) -> float:
+    client = http_clients.get('exchange_rates')
+    started = time.perf_counter()
+    for _ in range(n):
+        (await client.get(url)).json()
+    return time.perf_counter() - started
+
+
+async def main(n: int):
+    server, url = start_stub()
+    try:
+        fresh = await per_call_clients(url, n)
+        pooled = await pooled_client(url, n)
+    finally:
+        await http_clients.aclose()
+        server.shutdown()
+
+    print(f"requests:            {n}")
+    print(f"new client per call: {fresh * 1000 / n:.3f} ms/req")
+    print(f"pooled client:       {pooled * 1000 / n:.3f} ms/req")
+    print(f"speedup:             {fresh / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,103 @@
+"""
+Load test: /api/rates/* latency during a login storm
+
+Runs the app in-process over ASGI and, while a storm of concurrent
+/api/auth/login calls is in flight, probes /api/rates/currencies and reports
+p50/p99 latency. Three phases: no storm, storm with bcrypt inline on the
+event loop (the old behaviour), storm with the password hasher pool.
+
+Usage (from backend/):  python -m benchmarks.load_login_storm [LOGINS] [CONCURRENCY]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Isolated database and no background upstream traffic
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("RATE_REFRESH_ENABLED", "False")
+os.environ.setdefault("COMPETITORS_WATCH_ENABLED", "False")
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from app.routes import auth  # noqa: E402
+from app.services.password_hasher import password_hasher  # noqa: E402
+
+EMAIL = "storm@example.com"
+PASSWORD = "password123"
+
+
+async def inline_verify(password: str, hashed_password: str) -> bool:
+    # Old behaviour: bcrypt directly inside the async handler
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list, interval: float = 0.01):
+    # Probes are scheduled every `interval`; latency counts from the scheduled
+    # time, so a blocked event loop shows up instead of being skipped over
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await client.get("/api/rates/currencies")
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled += interval
+
+
+async def storm(client: httpx.AsyncClient, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+    await asyncio.gather(*(one() for _ in range(logins)))
+
+
+async def phase(client: httpx.AsyncClient, name: str, logins: int, concurrency: int, duration: float = 2.0):
+    latencies: list = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(client, stop, latencies))
+    started = time.perf_counter()
+    if logins:
+        await storm(client, logins, concurrency)
+    else:
+        await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:28s} logins={logins:4d} in {elapsed:6.2f}s  probes={len(latencies):4d}  "
+          f"p50={statistics.median(latencies):8.2f} ms  p99={p99:8.2f} ms")
+
+
+async def run(logins: int, concurrency: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json={"email": EMAIL, "name": "Storm", "password": PASSWORD})
+
+        await phase(client, "baseline (no logins)", 0, concurrency)
+
+        original = auth.verify_password
+        auth.verify_password = inline_verify
+        try:
+            await phase(client, "storm, bcrypt on event loop", logins, concurrency)
+        finally:
+            auth.verify_password = original
+
+        await phase(client, "storm, hasher thread pool", logins, concurrency)
+        print("hasher stats:", password_hasher.get_stats())
+
+
+if __name__ == "__main__":
+    n_logins = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(run(n_logins, n_concurrency))
@@ -1,13 +1,21 @@
 from decouple import config
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.database import engine, Base
+from app.models.database import engine, Base, get_pool_stats
+from app.models.migrations import run_migrations
 from app.routes import auth, transactions, rates
-from app.routes import ai
+from app.routes import ai, blockchain
+from app.services.competitors import competitor_store, COMPETITORS_WATCH_ENABLED
+from app.services.http_clients import http_clients
+from app.services.password_hasher import password_hasher
+from app.services.rate_refresher import rate_refresher, RATE_REFRESH_ENABLED
+from app.services.review_queue import review_queue
+from app.services.blockchain import blockchain_service
 
 
-# Create tables
+# Create tables, then bring existing databases up to the current indexes
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(
     title=config("APP_NAME", default="RemitEasy API"),
@@ -24,6 +32,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # /history pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -31,6 +41,25 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
 app.include_router(rates.router, prefix="/api/rates", tags=["rates"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
+app.include_router(blockchain.router, prefix="/api/blockchain", tags=["blockchain"])
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if RATE_REFRESH_ENABLED:
+        rate_refresher.start(rates.SUPPORTED_CURRENCIES.keys())
+    if COMPETITORS_WATCH_ENABLED:
+        competitor_store.start_watching()
+    await review_queue.start()
+    await blockchain_service.resume_pending()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await rate_refresher.stop()
+    await competitor_store.stop_watching()
+    await review_queue.stop()
+    await blockchain_service.shutdown()
+    await http_clients.aclose()
+    password_hasher.shutdown()
 
 @app.get("/")
 async def root():
@@ -40,3 +69,7 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def db_pool_stats():
+    """Connection pool checkout and wait statistics"""
+    return get_pool_stats()